@@ -14,7 +14,7 @@ Design principles:
 from typing import Dict, Any, List
 
 from src.generation.citation_bound_answer_generation import (
-    generate_citation_bound_answer_cached
+    agenerate_citation_bound_answer_cached
 )
 from src.orchestrator.agent_schema import AgentResult
 from src.orchestrator.agent_validation import validate_agent_result
@@ -28,17 +28,19 @@ async def citation_agent(
     STEP 6 adapter for STEP 5 citation-bound answer generation.
 
     Responsibilities:
-    - Generate citation-bound answer (STEP 5)
+    - Generate citation-bound answer (STEP 5) from the retrieval agent's
+      "multi_retrieval" (retrieves only if it is missing)
     - Return validated AgentResult for orchestration
     - Include raw retrieval payload if needed downstream
     """
 
     # -------------------------------
-    # STEP 5 passthrough
+    # STEP 5 passthrough (reused retrieval + pooled LLM client)
     # -------------------------------
-    citation_output = generate_citation_bound_answer_cached(
+    citation_output = await agenerate_citation_bound_answer_cached(
         query_text=query,
-        top_k=5
+        top_k=5,
+        multi_retrieval=retrieval_result.get("multi_retrieval")
     )
 
     retrieved_chunks: List[dict] = citation_output.get("retrieved_chunks", [])
@@ -1,6 +1,6 @@
 from typing import Dict, Any, List
 
-from src.retrieval.run_embeddings_retrieval import retrieve
+from src.generation.citation_bound_answer_generation import aretrieve_answer_sources
 from src.orchestrator.agent_schema import AgentResult
 from src.orchestrator.agent_validation import validate_agent_result
 
@@ -16,16 +16,20 @@ async def retrieval_agent(query: str) -> Dict[str, Any]:
     - Execute retrieval across all configured vector stores
     - Fail fast if nothing is retrieved
     - Return a validated AgentResult + raw retrieval payload
+
+    Retrieval uses the same filters, top_k and diversity as STEP 5
+    generation, so the citation agent can build its prompt from
+    "multi_retrieval" without retrieving again.
     """
 
     all_chunks: List[dict] = []
     source_refs: List[str] = []
 
+    # One query embedding shared by all stores; searches run off the event loop
+    multi_result = await aretrieve_answer_sources(query_text=query)
+
     for store_key in VECTOR_STORES:
-        result = retrieve(
-            query_text=query,
-            vector_store_key=store_key,
-        )
+        result = multi_result["results_by_store"].get(store_key, {})
 
         chunks = result.get("retrieved_chunks", [])
         if chunks:
@@ -58,4 +62,5 @@ async def retrieval_agent(query: str) -> Dict[str, Any]:
     return {
         "agent_result": agent_result,
         "retrieved_chunks": all_chunks,
+        "multi_retrieval": multi_result,
     }
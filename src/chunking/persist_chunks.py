@@ -1,8 +1,13 @@
 import json
 from pathlib import Path
 
+from retrieval.lexical_index import bm25_path_for, save_bm25_index
+
 def save_chunks(chunks, output_path):
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(chunks, f, indent=2, ensure_ascii=False)
+
+    # Lexical (BM25) index is rebuilt with every chunk persist
+    save_bm25_index(chunks, bm25_path_for(output_path))
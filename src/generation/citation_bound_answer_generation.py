@@ -1,109 +1,269 @@
 """
 STEP 5 — Citation-Bound Answer Generation
 Uses STEP 4 retrieval output to generate multi-regulator, citation-bound answers
-with GPT-5 mini.
+with GPT-5 mini, either as one response or streamed token by token
+(`stream_citation_bound_answer`). Async callers (STEP 6 agents) use
+`agenerate_citation_bound_answer(_cached)`. LLM calls go through the pooled,
+concurrency-bounded client in `llm_client.py`.
+
+Generation also accepts a pre-computed `multi_retrieval` (from
+`retrieve_answer_sources` / `aretrieve_answer_sources`), so a caller that
+has already retrieved (the STEP 6 orchestrator) does not retrieve twice.
 """
 
-import os
+import asyncio
 import json
 import hashlib
 from datetime import datetime
-from src.retrieval.run_embeddings_retrieval import retrieve, vector_store, embed_text
-import openai
-
-
-CACHE_DIR = "data/step5_cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
-
-def get_cache_file(query_text: str) -> str:
-    """Return the path for a cached response for a query."""
-    query_hash = hashlib.md5(query_text.encode("utf-8")).hexdigest()
-    return os.path.join(CACHE_DIR, f"{query_hash}.json")
-
-def generate_citation_bound_answer_cached(query_text: str, top_k: int = 5):
-    """Generate or load a citation-bound answer using cache."""
-    cache_file = get_cache_file(query_text)
-    
-    # Return cached response if it exists
-    if os.path.exists(cache_file):
-        with open(cache_file, "r", encoding="utf-8") as f:
-            return json.load(f)
-    
-    # Otherwise, generate answer
-    response = generate_citation_bound_answer(query_text, top_k=top_k)
-    
-    # Save to cache
-    with open(cache_file, "w", encoding="utf-8") as f:
-        json.dump(response, f, indent=2)
-    
-    return response
+from src.generation.context_packing import CONTEXT_TOKEN_BUDGET, DROP_NEAR_DUPLICATE, pack_context
+from src.generation.llm_client import LLMClient
+from src.retrieval.run_embeddings_retrieval import (
+    aretrieve_multi, retrieve_multi, vector_store, corpus_fingerprint,
+)
+from src.retrieval.result_cache import ResultCache
+from src.retrieval.single_flight import SingleFlight
 
-# -------------------------------
-# Configure OpenAI API Key
-# -------------------------------
-openai.api_key = os.getenv("OPENAI_API_KEY")
-if not openai.api_key:
-    raise EnvironmentError("OPENAI_API_KEY environment variable not set")
+
+REGULATORS = {
+    "CSSF": {"vector_store_key": "cssf", "authority": "CSSF", "jurisdiction": "LU"},
+    "DORA": {"vector_store_key": "dora", "authority": "European Union", "jurisdiction": "EU"},
+    "EBA": {"vector_store_key": "eba", "authority": "European Banking Authority", "jurisdiction": "EU"}
+}
+
+# MMR diversity of the retrieved context (see src/retrieval/diversity.py):
+# overlapping chunks are sent to the LLM once
+ANSWER_DIVERSITY = 0.3
+
+ANSWER_CACHE_NAMESPACE = "answers"
+answer_cache = ResultCache()
+answer_flight = SingleFlight("answers")
+
+def answer_cache_key(query_text: str, top_k: int = 5, multi_retrieval=None) -> str:
+    """
+    Return the cache key for a generated answer.
+
+    Includes the fingerprints of the regulator stores, so answers are
+    regenerated once any of them is re-indexed. A supplied `multi_retrieval`
+    is keyed by its fused (store, chunk id) pairs, so an answer is only
+    reused for the same sources.
+    """
+    fingerprint = corpus_fingerprint(info["vector_store_key"] for info in REGULATORS.values())
+    key = f"{query_text}|{top_k}|{ANSWER_DIVERSITY}|{CONTEXT_TOKEN_BUDGET}|{fingerprint}"
+    if multi_retrieval is not None:
+        sources = sorted((c["vector_store_key"], c["chunk_id"]) for c in multi_retrieval["fused_chunks"])
+        key += "|" + json.dumps(sources)
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+def generate_citation_bound_answer_cached(query_text: str, top_k: int = 5, multi_retrieval=None):
+    """
+    Generate or load a citation-bound answer using cache.
+
+    Concurrent requests for the same answer share one generation (see
+    `src/retrieval/single_flight.py`).
+    """
+    cache_key = answer_cache_key(query_text, top_k, multi_retrieval)
+
+    def load_or_generate():
+        # Return cached response if it exists
+        cached = answer_cache.get(ANSWER_CACHE_NAMESPACE, cache_key)
+        if cached is not None:
+            return cached
+
+        # Otherwise, generate answer
+        response = generate_citation_bound_answer(query_text, top_k=top_k, multi_retrieval=multi_retrieval)
+
+        # Save to cache (single atomic write, evicted by TTL / byte budget)
+        answer_cache.set(ANSWER_CACHE_NAMESPACE, cache_key, response)
+
+        return response
+
+    return answer_flight.do(cache_key, load_or_generate)
+
+def stream_citation_bound_answer_cached(query_text: str, top_k: int = 5):
+    """
+    Streaming variant of `generate_citation_bound_answer_cached`.
+
+    A cached answer is replayed as a single token; otherwise tokens are
+    streamed from the LLM and the assembled response is cached once the
+    stream has been fully consumed.
+    """
+    cache_key = answer_cache_key(query_text, top_k)
+
+    cached = answer_cache.get(ANSWER_CACHE_NAMESPACE, cache_key)
+    if cached is not None:
+        return AnswerStream(iter([cached["answer"]]), lambda answer: cached)
+
+    context = prepare_answer_context(query_text, top_k=top_k)
+
+    def finalize(answer):
+        response = build_answer_response(query_text, answer, context)
+        answer_cache.set(ANSWER_CACHE_NAMESPACE, cache_key, response)
+        return response
+
+    return AnswerStream(llm_stream(context["prompt"]), finalize)
+
+async def agenerate_citation_bound_answer_cached(query_text: str, top_k: int = 5, multi_retrieval=None):
+    """Async `generate_citation_bound_answer_cached`; cache I/O runs in worker threads."""
+    cache_key = await asyncio.to_thread(answer_cache_key, query_text, top_k, multi_retrieval)
+
+    async def load_or_generate():
+        cached = await asyncio.to_thread(answer_cache.get, ANSWER_CACHE_NAMESPACE, cache_key)
+        if cached is not None:
+            return cached
+
+        response = await agenerate_citation_bound_answer(query_text, top_k=top_k, multi_retrieval=multi_retrieval)
+        await asyncio.to_thread(answer_cache.set, ANSWER_CACHE_NAMESPACE, cache_key, response)
+        return response
+
+    return await answer_flight.ado(cache_key, load_or_generate)
 
 # -------------------------------
-# GPT-5 mini call
+# GPT-5 mini call (pooled client, created on first call)
 # -------------------------------
+llm_client = LLMClient()
+
+def llm_messages(prompt: str):
+    return [
+        {"role": "system", "content": "You are a compliance-aware AI. Answer strictly using provided source chunks."},
+        {"role": "user", "content": prompt}
+    ]
+
 def llm_call(prompt: str) -> str:
     """
-    Call GPT-5 mini using OpenAI >=1.0.0
+    Call GPT-5 mini (blocking; bounded, deadline and retries from `llm_client`)
     """
-    response = openai.chat.completions.create(
-        model="gpt-5-mini",
-        messages=[
-            {"role": "system", "content": "You are a compliance-aware AI. Answer strictly using provided source chunks."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response.choices[0].message.content.strip()
+    return llm_client.complete_sync(llm_messages(prompt))
+
+async def allm_call(prompt: str) -> str:
+    """
+    Call GPT-5 mini without blocking the event loop
+    """
+    return await llm_client.complete(llm_messages(prompt))
+
+def llm_stream(prompt: str):
+    """
+    Call GPT-5 mini with streaming; yields answer text deltas as they arrive.
+    """
+    yield from llm_client.stream_sync(llm_messages(prompt))
+
+class AnswerStream:
+    """
+    Iterable of answer tokens (e.g. for `st.write_stream`).
+
+    Once every token has been consumed, `response` holds the structured
+    answer, identical to `generate_citation_bound_answer`'s output.
+    """
+
+    def __init__(self, tokens, finalize):
+        self._tokens = tokens
+        self._finalize = finalize
+        self.response = None
+
+    def __iter__(self):
+        parts = []
+        for token in self._tokens:
+            parts.append(token)
+            yield token
+        self.response = self._finalize("".join(parts).strip())
 
 # -------------------------------
 # Citation-Bound Answer Generation
 # -------------------------------
-def generate_citation_bound_answer(query_text: str, top_k: int = 5):
+def regulator_filters():
+    return {
+        reg_info["vector_store_key"]: {
+            "authority": reg_info["authority"],
+            "jurisdiction": reg_info["jurisdiction"],
+        }
+        for reg_info in REGULATORS.values()
+    }
+
+def retrieve_answer_sources(query_text: str, top_k: int = 5):
     """
-    Retrieve relevant chunks from CSSF, DORA, EBA and generate a citation-bound answer
+    Multi-regulator retrieval an answer is built from (query embedded once for all stores).
     """
-    regulators = {
-        "CSSF": {"vector_store_key": "cssf", "authority": "CSSF", "jurisdiction": "LU"},
-        "DORA": {"vector_store_key": "dora", "authority": "European Union", "jurisdiction": "EU"},
-        "EBA": {"vector_store_key": "eba", "authority": "European Banking Authority", "jurisdiction": "EU"}
-    }
+    return retrieve_multi(
+        query_text=query_text,
+        store_filters=regulator_filters(),
+        top_k=top_k,
+        diversity=ANSWER_DIVERSITY
+    )
+
+async def aretrieve_answer_sources(query_text: str, top_k: int = 5):
+    """Async `retrieve_answer_sources` (see `aretrieve_multi`)."""
+    return await aretrieve_multi(
+        query_text=query_text,
+        store_filters=regulator_filters(),
+        top_k=top_k,
+        diversity=ANSWER_DIVERSITY
+    )
+
+def prepare_answer_context(query_text: str, top_k: int = 5, multi_retrieval=None):
+    """
+    Retrieve relevant chunks from CSSF, DORA, EBA and build the citation-bound prompt.
 
-    retrieved_chunks_all = []
-    llm_input = ""
-    similarity_scores = []
+    A `multi_retrieval` from `retrieve_answer_sources(query_text, top_k)`
+    is used as is instead of retrieving again.
+
+    Returns {"prompt", "retrieved_chunks", "answer_confidence", "context_packing"}.
+    """
+    if multi_retrieval is None:
+        multi_retrieval = retrieve_answer_sources(query_text, top_k=top_k)
+    return build_answer_context(query_text, multi_retrieval)
+
+async def aprepare_answer_context(query_text: str, top_k: int = 5, multi_retrieval=None):
+    """Async `prepare_answer_context`."""
+    if multi_retrieval is None:
+        multi_retrieval = await aretrieve_answer_sources(query_text, top_k=top_k)
+    return build_answer_context(query_text, multi_retrieval)
+
+def build_answer_context(query_text: str, multi_retrieval):
+    """
+    Citation-bound prompt, hydrated chunks and confidence for a `retrieve_multi` result.
+
+    Chunk texts are packed into CONTEXT_TOKEN_BUDGET tokens (see
+    `context_packing.py`); only packed chunks are cited, and trimmed or
+    dropped chunks are reported under "context_packing", each drop with
+    its reason (near_duplicate, token_budget or no_matching_passage).
+    """
+    regulators = REGULATORS
+
+    candidates = []
+    near_duplicates = []
+
+    # Chunks kept after cross-regulator near-duplicate suppression
+    kept_ids = {(c["vector_store_key"], c["chunk_id"]) for c in multi_retrieval["fused_chunks"]}
 
-    # Multi-regulator retrieval
     for reg_name, reg_info in regulators.items():
-        retrieval = retrieve(
-            query_text=query_text,
-            vector_store_key=reg_info["vector_store_key"],
-            authority=reg_info["authority"],
-            jurisdiction=reg_info["jurisdiction"],
-            top_k=top_k
-        )
-
-        for chunk_info in retrieval["retrieved_chunks"]:
-            metadata_list = vector_store[reg_info["vector_store_key"]]["metadata"]
-            chunk_meta = next((c for c in metadata_list if c["chunk_id"] == chunk_info["chunk_id"]), None)
-            if not chunk_meta:
-                continue
+        retrieval = multi_retrieval["results_by_store"][reg_info["vector_store_key"]]
+
+        # Attach chunk text/metadata to all hits at once (registry lookup by chunk_id)
+        registry = vector_store[reg_info["vector_store_key"]]["registry"]
+        hits = []
+        for c in retrieval["retrieved_chunks"]:
+            if (reg_info["vector_store_key"], c["chunk_id"]) in kept_ids:
+                hits.append(c)
+            else:
+                near_duplicates.append({"chunk_id": c["chunk_id"], "reason": DROP_NEAR_DUPLICATE})
+        for chunk in registry.hydrate(hits):
             # Use regulator name from iteration, not missing field
-            regulator_name = reg_name
-            source_ref = chunk_meta.get("source_reference", chunk_info["source_reference"])
-            llm_input += f"[{regulator_name} {source_ref}] {chunk_meta['text']}\n"
-            retrieved_chunks_all.append({
-                "chunk_id": chunk_meta["chunk_id"],
-                "source_reference": source_ref,
-                "source_regulation": regulator_name,
-                "similarity_score": chunk_info["similarity_score"]
+            candidates.append({
+                "chunk_id": chunk["chunk_id"],
+                "source_reference": chunk["source_reference"],
+                "source_regulation": reg_name,
+                "similarity_score": chunk["similarity_score"],
+                "text": chunk["text"],
             })
-            similarity_scores.append(chunk_info["similarity_score"])
+
+    # Fit chunk texts into the token budget, best scores first
+    packed, packing_report = pack_context(candidates, query_text)
+    packing_report["dropped"] = near_duplicates + packing_report["dropped"]
+
+    llm_input = "".join(
+        f"[{c['source_regulation']} {c['source_reference']}] {c['text']}\n" for c in packed
+    )
+    retrieved_chunks_all = [{k: v for k, v in c.items() if k != "text"} for c in packed]
+    similarity_scores = [c["similarity_score"] for c in packed]
 
     # Compute answer confidence
     answer_confidence = round(sum(similarity_scores)/len(similarity_scores), 4) if similarity_scores else 0.0
@@ -122,20 +282,58 @@ def generate_citation_bound_answer(query_text: str, top_k: int = 5):
             Answer:
             """
 
-    # Generate answer using GPT-5 mini
-    answer = llm_call(prompt)
+    return {
+        "prompt": prompt,
+        "retrieved_chunks": retrieved_chunks_all,
+        "answer_confidence": answer_confidence,
+        "context_packing": packing_report,
+    }
 
-    # Structured response
-    response = {
+def build_answer_response(query_text: str, answer: str, context):
+    """Structured STEP 5 response for a generated answer."""
+    return {
         "query": query_text,
         "answer": answer,
-        "answer_confidence": answer_confidence,
-        "retrieved_chunks": retrieved_chunks_all,
-        "retrieval_filters": {reg: {"authority": info["authority"], "jurisdiction": info["jurisdiction"]} for reg, info in regulators.items()},
+        "answer_confidence": context["answer_confidence"],
+        "retrieved_chunks": context["retrieved_chunks"],
+        "retrieval_filters": {reg: {"authority": info["authority"], "jurisdiction": info["jurisdiction"]} for reg, info in REGULATORS.items()},
+        "context_packing": context.get("context_packing"),
         "timestamp": datetime.now().isoformat()
     }
 
-    return response
+def generate_citation_bound_answer(query_text: str, top_k: int = 5, multi_retrieval=None):
+    """
+    Retrieve relevant chunks from CSSF, DORA, EBA (unless `multi_retrieval`
+    is given) and generate a citation-bound answer
+    """
+    context = prepare_answer_context(query_text, top_k=top_k, multi_retrieval=multi_retrieval)
+
+    # Generate answer using GPT-5 mini
+    answer = llm_call(context["prompt"])
+
+    return build_answer_response(query_text, answer, context)
+
+async def agenerate_citation_bound_answer(query_text: str, top_k: int = 5, multi_retrieval=None):
+    """
+    Async `generate_citation_bound_answer`: native async retrieval and LLM call
+    """
+    context = await aprepare_answer_context(query_text, top_k=top_k, multi_retrieval=multi_retrieval)
+    answer = await allm_call(context["prompt"])
+    return build_answer_response(query_text, answer, context)
+
+def stream_citation_bound_answer(query_text: str, top_k: int = 5):
+    """
+    Streaming variant of `generate_citation_bound_answer`.
+
+    Retrieval runs immediately; iterating the returned `AnswerStream`
+    yields answer tokens as GPT-5 mini produces them, and its `response`
+    is set once the stream is exhausted.
+    """
+    context = prepare_answer_context(query_text, top_k=top_k)
+    return AnswerStream(
+        llm_stream(context["prompt"]),
+        lambda answer: build_answer_response(query_text, answer, context)
+    )
 
 # -------------------------------
 # Example usage
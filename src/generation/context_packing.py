@@ -0,0 +1,107 @@
+"""
+STEP 5 — Context Packing
+------------------------
+Fits retrieved chunks into a token budget before they enter the
+citation-bound prompt:
+
+- chunks are packed by similarity score, best first
+- chunks longer than MAX_CHUNK_TOKENS (or than the budget left) are
+  trimmed to their passages that best match the query, in text order;
+  the leading passage (article / section heading) is always kept
+- chunks that no longer fit are dropped ("token_budget"), as are chunks
+  whose trimmed form keeps nothing that matches the query
+  ("no_matching_passage"); every trim or drop is recorded with its
+  reason so it can be reported with the answer
+
+Tokens are estimated with the shared `token_estimate.estimate_tokens`,
+as for embedding batches.
+"""
+
+import os
+import re
+
+from src.retrieval.token_estimate import estimate_tokens
+from src.retrieval.lexical_index import tokenize
+
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKENS", "4000"))
+MAX_CHUNK_TOKENS = 800
+MIN_CHUNK_TOKENS = 60        # below this, a trimmed chunk is not worth citing
+PASSAGE_SEPARATOR = " [...] "
+PASSAGE_PATTERN = re.compile(r"(?<=[.;:])\s+(?=[A-Z0-9(])")
+
+# Reasons a retrieved chunk is left out of the prompt
+DROP_TOKEN_BUDGET = "token_budget"
+DROP_NO_MATCHING_PASSAGE = "no_matching_passage"
+DROP_NEAR_DUPLICATE = "near_duplicate"    # set by the caller (cross-store MMR)
+
+
+def split_passages(text):
+    return [p.strip() for p in PASSAGE_PATTERN.split(text) if p.strip()]
+
+
+def trim_to_passages(text, query_text, max_tokens):
+    """
+    Keep the passages of `text` that share most terms with the query,
+    within `max_tokens`, in their original order. Returns "" if not even
+    the leading passage fits, or if no kept passage matches the query.
+    """
+    passages = split_passages(text)
+    if not passages:
+        return ""
+    query_terms = set(tokenize(query_text))
+    # Separator included, so the joined text never exceeds the sum
+    tokens = [estimate_tokens(p + PASSAGE_SEPARATOR) for p in passages]
+    scores = [len(query_terms.intersection(tokenize(p))) for p in passages]
+
+    if tokens[0] > max_tokens:
+        return ""
+    kept = {0}
+    used = tokens[0]
+    for i in sorted(range(1, len(passages)), key=lambda i: (-scores[i], i)):
+        if scores[i] == 0:
+            break
+        if used + tokens[i] <= max_tokens:
+            kept.add(i)
+            used += tokens[i]
+    if not any(scores[i] for i in kept):
+        return ""
+    return PASSAGE_SEPARATOR.join(passages[i] for i in sorted(kept))
+
+
+def pack_context(chunks, query_text, budget=CONTEXT_TOKEN_BUDGET, max_chunk_tokens=MAX_CHUNK_TOKENS):
+    """
+    Pack chunks (dicts with "chunk_id", "text", "similarity_score") into
+    `budget` tokens.
+
+    Returns (packed, report): `packed` holds the kept chunks in input order,
+    with "text" possibly trimmed; `report` is
+    {"token_budget", "tokens_used", "trimmed": [chunk_id], "dropped": [{"chunk_id", "reason"}]}.
+    """
+    order = sorted(range(len(chunks)), key=lambda i: -chunks[i]["similarity_score"])
+    remaining = budget
+    kept = {}
+    report = {"token_budget": budget, "tokens_used": 0, "trimmed": [], "dropped": []}
+
+    for i in order:
+        chunk = chunks[i]
+        text = chunk["text"]
+        limit = min(max_chunk_tokens, remaining)
+        if estimate_tokens(text) > limit:
+            reason = DROP_TOKEN_BUDGET
+            if limit >= MIN_CHUNK_TOKENS:
+                text = trim_to_passages(text, query_text, limit)
+                heading = split_passages(chunk["text"])[:1]
+                if not text and heading and estimate_tokens(heading[0] + PASSAGE_SEPARATOR) <= limit:
+                    reason = DROP_NO_MATCHING_PASSAGE
+            else:
+                text = ""
+            if not text:
+                report["dropped"].append({"chunk_id": chunk["chunk_id"], "reason": reason})
+                continue
+            report["trimmed"].append(chunk["chunk_id"])
+        kept[i] = {**chunk, "text": text}
+        remaining -= estimate_tokens(text)
+
+    report["tokens_used"] = budget - remaining
+    return [kept[i] for i in sorted(kept)], report
@@ -0,0 +1,234 @@
+"""
+STEP 5 — Pooled LLM Client
+--------------------------
+Shared chat-completion client for answer generation:
+
+- one HTTP connection pool per client (sync) and per event loop (async),
+  sized to the concurrency limit and reused across requests
+- at most LLM_CONCURRENCY requests in flight per client, shared by the
+  sync and async APIs (one slot pool, so mixed callers cannot exceed it)
+- a deadline per request (LLM_TIMEOUT_SECONDS), spanning all retries
+- retries of transient errors (connection, timeout, 429, 5xx) with
+  exponential backoff and jitter, as long as the deadline allows
+
+The OpenAI SDK's own retries are disabled so the deadline stays exact.
+Clients are created on first call, never at import time.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from src.retrieval.transient_errors import is_retryable
+
+
+LLM_MODEL = "gpt-5-mini"
+LLM_CONCURRENCY = int(os.getenv("RAG_LLM_CONCURRENCY", "8"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("RAG_LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("RAG_LLM_MAX_RETRIES", "3"))
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+
+
+def _api_key():
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise EnvironmentError("OPENAI_API_KEY environment variable not set")
+    return api_key
+
+
+class LLMClient:
+    """
+    Chat completions with bounded concurrency, deadlines and jittered retries.
+
+    `complete` is the async API (one AsyncOpenAI client per event loop);
+    `complete_sync` / `stream_sync` serve threaded callers such as the
+    Streamlit apps through one shared client. Both draw from the same
+    `concurrency` slots.
+    """
+
+    def __init__(self, model=LLM_MODEL, concurrency=LLM_CONCURRENCY, timeout=LLM_TIMEOUT_SECONDS,
+                 max_retries=LLM_MAX_RETRIES, backoff_base=BACKOFF_BASE_SECONDS,
+                 backoff_max=BACKOFF_MAX_SECONDS, client=None, async_client=None):
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client = client
+        self._async_client = async_client
+        self._lock = threading.Lock()
+        # Request slots shared by every thread and event loop using this client
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._slot_waiters = None
+        # Pooled connections and asyncio semaphores cannot outlive their loop
+        self._per_loop = weakref.WeakKeyDictionary()
+        self.stats = {"requests": 0, "retries": 0, "timeouts": 0}
+
+    # -------------------------------
+    # Clients
+    # -------------------------------
+    def _limits(self):
+        import httpx
+
+        return httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                import httpx
+                from openai import OpenAI
+
+                self._client = OpenAI(
+                    api_key=_api_key(), max_retries=0,
+                    http_client=httpx.Client(limits=self._limits()),
+                )
+        return self._client
+
+    def _loop_state(self):
+        loop = asyncio.get_running_loop()
+        state = self._per_loop.get(loop)
+        if state is None:
+            client = self._async_client
+            if client is None:
+                import httpx
+                from openai import AsyncOpenAI
+
+                client = AsyncOpenAI(
+                    api_key=_api_key(), max_retries=0,
+                    http_client=httpx.AsyncClient(limits=self._limits()),
+                )
+            state = {"client": client, "slots": asyncio.Semaphore(self.concurrency)}
+            self._per_loop[loop] = state
+        return state
+
+    # -------------------------------
+    # Shared request slots
+    # -------------------------------
+    async def _acquire_slot(self):
+        """Take a shared slot without blocking the event loop."""
+        if self._slots.acquire(blocking=False):
+            return
+        with self._lock:
+            if self._slot_waiters is None:
+                self._slot_waiters = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="rag-llm-slot"
+                )
+        waiting = asyncio.get_running_loop().run_in_executor(self._slot_waiters, self._slots.acquire)
+        try:
+            await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            # The slot is still granted later; hand it straight back
+            waiting.add_done_callback(lambda _: self._slots.release())
+            raise
+
+    # -------------------------------
+    # Retry policy
+    # -------------------------------
+    def _backoff(self, attempt, deadline, error):
+        """Delay before the next attempt, or None to give up (and re-raise)."""
+        import openai
+
+        if isinstance(error, (TimeoutError, openai.APITimeoutError)):
+            self._count("timeouts")
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+        if time.monotonic() + delay >= deadline:
+            return None
+        self._count("retries")
+        return delay
+
+    def _deadline(self, timeout):
+        return time.monotonic() + (self.timeout if timeout is None else timeout)
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _request(self, messages, **kwargs):
+        self._count("requests")
+        return {"model": self.model, "messages": messages, **kwargs}
+
+    # -------------------------------
+    # Async API
+    # -------------------------------
+    async def complete(self, messages, timeout=None):
+        """Answer text of one chat completion, within `timeout` seconds overall."""
+        deadline = self._deadline(timeout)
+        state = self._loop_state()
+        # The per-loop semaphore bounds how many coroutines wait for a shared slot
+        async with state["slots"]:
+            await self._acquire_slot()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    remaining = deadline - time.monotonic()
+                    try:
+                        if remaining <= 0:
+                            raise TimeoutError()
+                        response = await asyncio.wait_for(
+                            state["client"].chat.completions.create(**self._request(messages)), remaining
+                        )
+                        return response.choices[0].message.content.strip()
+                    except Exception as error:
+                        delay = self._backoff(attempt, deadline, error)
+                        if delay is None:
+                            raise
+                        await asyncio.sleep(delay)
+            finally:
+                self._slots.release()
+
+    async def aclose(self):
+        """Close the connection pool of the running loop."""
+        state = self._per_loop.pop(asyncio.get_running_loop(), None)
+        if state is not None and state["client"] is not self._async_client:
+            await state["client"].close()
+
+    # -------------------------------
+    # Sync API
+    # -------------------------------
+    def complete_sync(self, messages, timeout=None):
+        deadline = self._deadline(timeout)
+        with self._slots:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError()
+                    response = self.client().chat.completions.create(
+                        **self._request(messages), timeout=remaining
+                    )
+                    return response.choices[0].message.content.strip()
+                except Exception as error:
+                    delay = self._backoff(attempt, deadline, error)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+
+    def stream_sync(self, messages, timeout=None):
+        deadline = self._deadline(timeout)
+        with self._slots:
+            for attempt in range(self.max_retries + 1):
+                started = False
+                try:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError()
+                    response = self.client().chat.completions.create(
+                        **self._request(messages, stream=True), timeout=remaining
+                    )
+                    for chunk in response:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            started = True
+                            yield chunk.choices[0].delta.content
+                    return
+                except Exception as error:
+                    delay = None if started else self._backoff(attempt, deadline, error)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
@@ -12,6 +12,8 @@ from typing import Dict, Any
 from datetime import datetime, timezone
 import asyncio
 
+from src.retrieval.single_flight import SingleFlight
+
 # LangChain-wrapped agents (STEP 6.3)
 from src.orchestrator.langchain_wrappers import (
     retrieval_chain,
@@ -20,6 +22,9 @@ from src.orchestrator.langchain_wrappers import (
     risk_assessment_chain,
 )
 
+# Concurrent runs of the same query and model version share one pipeline run
+run_flight = SingleFlight("orchestrator")
+
 # -------------------------------
 # Orchestrator
 # -------------------------------
@@ -39,6 +44,9 @@ class MultiAgentOrchestrator:
         self.model_version = model_version
 
     async def run(self, query: str) -> Dict[str, Any]:
+        return await run_flight.ado(f"{self.model_version}|{query}", self._run, query)
+
+    async def _run(self, query: str) -> Dict[str, Any]:
         start_time = datetime.now(timezone.utc).isoformat()
 
         # -------------------------------
@@ -0,0 +1,171 @@
+"""
+STEP 4 — Index Specifications
+-----------------------------
+Per-store index configuration for exact and approximate search.
+
+Supported specs (dicts, persisted verbatim in the store manifest):
+
+- {"type": "flat"}                                   exact inner product
+- {"type": "hnsw", "M": 32, "ef_construction": 200, "ef_search": 64}
+- {"type": "ivfpq", "nlist": None, "pq_m": 64, "nbits": 8, "nprobe": 16}
+
+Optional storage keys (flat and hnsw specs):
+
+- "storage": "float32" (default), "float16", "int8" (scalar quantizer)
+  or "pq" (product quantizer, uses "pq_m" / "nbits")
+- "truncate_dim": keep the first N dimensions and re-normalize
+  (text-embedding-3 vectors keep most of their quality when shortened)
+
+The index is the only persisted copy of the vectors; `stored_vectors`
+decodes them (zero-copy for float32 flat storage).
+
+All indexes use METRIC_INNER_PRODUCT on L2-normalized vectors, i.e.
+cosine similarity, so scores stay comparable with SIMILARITY_THRESHOLD.
+"""
+
+import math
+
+import faiss
+import numpy as np
+
+
+FLAT_SPEC = {"type": "flat"}
+HNSW_SPEC = {"type": "hnsw", "M": 32, "ef_construction": 200, "ef_search": 64}
+IVFPQ_SPEC = {"type": "ivfpq", "nlist": None, "pq_m": 64, "nbits": 8, "nprobe": 16}
+
+INDEX_TYPES = {"flat": FLAT_SPEC, "hnsw": HNSW_SPEC, "ivfpq": IVFPQ_SPEC}
+STORAGE_TYPES = ("float32", "float16", "int8", "pq")
+PQ_STORAGE_DEFAULTS = {"pq_m": 64, "nbits": 8}
+
+
+def resolve_spec(spec, n_vectors, dim):
+    """
+    Fill defaults and adapt a spec to the store size.
+
+    IVF-PQ needs enough training points for its coarse quantizer and
+    codebooks; small stores fall back to Flat (recorded in "fallback_from").
+    PQ storage falls back to int8 for the same reason.
+    """
+    spec = dict(spec or FLAT_SPEC)
+    index_type = spec.get("type", "flat")
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unsupported index type: {index_type}")
+    resolved = {**INDEX_TYPES[index_type], **spec}
+
+    storage = resolved.get("storage", "float32")
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unsupported vector storage: {storage}")
+    if storage == "float32":
+        resolved.pop("storage", None)
+    if resolved.get("truncate_dim"):
+        if resolved["truncate_dim"] > dim:
+            raise ValueError(f"truncate_dim {resolved['truncate_dim']} exceeds vector dimension {dim}")
+        dim = resolved["truncate_dim"]
+    else:
+        resolved.pop("truncate_dim", None)
+
+    if storage == "pq" and index_type != "ivfpq":
+        resolved = {**PQ_STORAGE_DEFAULTS, **resolved}
+        if index_type == "hnsw":
+            resolved["nbits"] = 8
+        if n_vectors < 39 * 2 ** resolved["nbits"] or dim % resolved["pq_m"]:
+            fallback = {k: v for k, v in resolved.items() if k not in PQ_STORAGE_DEFAULTS}
+            return {**fallback, "storage": "int8", "fallback_from": resolved}
+
+    if index_type == "ivfpq":
+        nlist = resolved["nlist"] or int(4 * math.sqrt(max(n_vectors, 1)))
+        nlist = min(nlist, n_vectors // 39)
+        if nlist < 1 or n_vectors < 39 * 2 ** resolved["nbits"] or dim % resolved["pq_m"]:
+            # The fallback still searches the requested (truncated) vectors
+            fallback = {**FLAT_SPEC, "fallback_from": resolved}
+            if resolved.get("truncate_dim"):
+                fallback["truncate_dim"] = resolved["truncate_dim"]
+            return fallback
+        resolved["nlist"] = nlist
+
+    return resolved
+
+
+def factory_string(spec):
+    storage = spec.get("storage", "float32")
+    if spec["type"] == "ivfpq":
+        return f"IVF{spec['nlist']},PQ{spec['pq_m']}x{spec['nbits']}"
+    if spec["type"] == "hnsw" and storage == "pq":
+        return f"HNSW{spec['M']}_PQ{spec['pq_m']}"
+
+    codec = {
+        "float32": "Flat",
+        "float16": "SQfp16",
+        "int8": "SQ8",
+        "pq": f"PQ{spec.get('pq_m')}x{spec.get('nbits')}",
+    }[storage]
+    if spec["type"] == "hnsw":
+        return f"HNSW{spec['M']},{codec}"
+    return codec
+
+
+def prepare_vectors(spec, vectors):
+    """Apply the spec's dimension truncation (and re-normalize); a no-op otherwise."""
+    truncate_dim = (spec or {}).get("truncate_dim")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if not truncate_dim or vectors.shape[-1] == truncate_dim:
+        return vectors
+    truncated = np.ascontiguousarray(vectors[..., :truncate_dim])
+    norms = np.linalg.norm(truncated, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return truncated / norms
+
+
+def build_index(spec, vectors):
+    """Create, train and fill an index for already-normalized vectors."""
+    spec = resolve_spec(spec, len(vectors), vectors.shape[1])
+    vectors = np.ascontiguousarray(prepare_vectors(spec, vectors))
+    index = faiss.index_factory(vectors.shape[1], factory_string(spec), faiss.METRIC_INNER_PRODUCT)
+
+    if spec["type"] == "hnsw":
+        index.hnsw.efConstruction = spec["ef_construction"]
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index, spec
+
+
+def stored_vectors(index):
+    """
+    Vectors held by an index, as a read-only float32 (ntotal, d) array.
+
+    Float32 flat storage (also inside HNSW) is exposed without copying,
+    including memory-mapped indexes; quantized storage is decoded.
+    """
+    storage = faiss.downcast_index(index.storage) if isinstance(index, faiss.IndexHNSW) else index
+    if isinstance(storage, faiss.IndexFlat):
+        vectors = faiss.rev_swig_ptr(storage.get_xb(), storage.ntotal * storage.d)
+        vectors = vectors.reshape(storage.ntotal, storage.d)
+    else:
+        if isinstance(index, faiss.IndexIVF):
+            index.make_direct_map()
+        vectors = index.reconstruct_n(0, index.ntotal)
+    vectors.flags.writeable = False
+    return vectors
+
+
+def is_lossless(spec):
+    """
+    Whether decoded vectors equal the original float32 vectors bit for bit.
+
+    Only float32 storage qualifies: float16 is exact enough for ranking but
+    not for rebuilding another index from its decoded vectors.
+    """
+    return spec["type"] != "ivfpq" and spec.get("storage", "float32") == "float32"
+
+
+def search_parameters(spec, selector=None):
+    """Search-time parameters (ID selector + ANN knobs) for a resolved spec."""
+    spec = spec or FLAT_SPEC
+    if spec["type"] == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=spec["ef_search"])
+    if spec["type"] == "ivfpq":
+        return faiss.SearchParametersIVF(sel=selector, nprobe=spec["nprobe"])
+    if selector is None:
+        return None
+    return faiss.SearchParameters(sel=selector)
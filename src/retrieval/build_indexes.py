@@ -0,0 +1,41 @@
+"""
+STEP 4 — Incremental Index Ingestion
+------------------------------------
+Brings the persisted vector stores in line with the chunk files after
+re-chunking. Only new or edited chunks are embedded; vectors of
+unchanged chunks are reused (see `update_index`).
+
+Usage:
+    python -m src.retrieval.build_indexes
+    python -m src.retrieval.build_indexes --stores cssf dora --output report.json
+"""
+
+import argparse
+import json
+
+from src.retrieval.run_embeddings_retrieval import CHUNK_FILES, update_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally rebuild vector stores from chunk files")
+    parser.add_argument("--stores", nargs="+", default=list(CHUNK_FILES), choices=list(CHUNK_FILES))
+    parser.add_argument("--output", help="Optional JSON file for the per-store report")
+    args = parser.parse_args()
+
+    reports = []
+    for store_key in args.stores:
+        report = update_index(store_key)
+        reports.append(report)
+        status = "unchanged" if report["unchanged"] else "rebuilt"
+        print(
+            f"{store_key:<5} {status:<9} chunks={report['chunks']:>5} reused={report['reused']:>5} "
+            f"embedded={report['embedded']:>5} removed={report['removed']:>5}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
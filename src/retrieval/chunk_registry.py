@@ -0,0 +1,70 @@
+"""
+STEP 4 — Chunk Registry
+-----------------------
+Constant-time chunk lookup for a vector store:
+
+- chunk_id -> row id (dict), row id -> chunk (array position)
+- batch lookups return numpy row arrays (-1 for unknown chunk ids)
+- `hydrate` attaches text and metadata to a list of retrieval hits
+  in one pass, instead of scanning the metadata list per hit
+"""
+
+import numpy as np
+
+
+class ChunkRegistry:
+    """Lookup by chunk_id and by FAISS row id over a store's metadata."""
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.chunk_ids = self.ids_of(metadata)
+        self._row_of = {chunk_id: row for row, chunk_id in enumerate(self.chunk_ids)}
+
+    @staticmethod
+    def ids_of(metadata):
+        """Chunk ids in row order; read from the id column of columnar metadata."""
+        chunk_ids = getattr(metadata, "chunk_ids", None)
+        return chunk_ids if chunk_ids is not None else [c["chunk_id"] for c in metadata]
+
+    def __len__(self):
+        return len(self.chunk_ids)
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self._row_of
+
+    def row(self, chunk_id):
+        """Row id of a chunk, or None if unknown."""
+        return self._row_of.get(chunk_id)
+
+    def rows(self, chunk_ids):
+        """Row ids for many chunk ids (int64 array, -1 where unknown)."""
+        return np.fromiter(
+            (self._row_of.get(chunk_id, -1) for chunk_id in chunk_ids),
+            dtype=np.int64,
+            count=len(chunk_ids),
+        )
+
+    def get(self, chunk_id):
+        """Chunk metadata (including text) by chunk_id, or None."""
+        row = self._row_of.get(chunk_id)
+        return None if row is None else self.metadata[row]
+
+    def by_rows(self, rows):
+        return [self.metadata[row] for row in np.asarray(rows, dtype=np.int64).tolist()]
+
+    def hydrate(self, hits, fields=None):
+        """
+        Attach chunk metadata to retrieval hits in one step.
+
+        Returns new dicts `{**metadata, **hit}` (hit fields such as scores and
+        source_reference take precedence); `fields` restricts the copied
+        metadata keys. Hits whose chunk_id is unknown are dropped.
+        """
+        rows = self.rows([h["chunk_id"] for h in hits])
+        known = np.flatnonzero(rows >= 0)
+        hydrated = []
+        for hit_pos, chunk in zip(known.tolist(), self.by_rows(rows[known])):
+            if fields is not None:
+                chunk = {f: chunk[f] for f in fields if f in chunk}
+            hydrated.append({**chunk, **hits[hit_pos]})
+        return hydrated
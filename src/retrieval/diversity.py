@@ -0,0 +1,50 @@
+"""
+STEP 4 — Result Diversification
+-------------------------------
+Maximal-marginal-relevance (MMR) re-ranking of retrieval hits with
+near-duplicate suppression, computed on the stored (normalized) vectors:
+
+- the pairwise cosine matrix of the candidates is one matrix product
+- each pick maximizes (1 - diversity) * relevance - diversity * redundancy,
+  where redundancy is the highest similarity to an already selected hit
+- candidates at least NEAR_DUPLICATE_THRESHOLD similar to a selected hit
+  are dropped, so overlapping paragraphs / articles are returned once
+
+`diversity=0` keeps the relevance order and only removes near-duplicates.
+"""
+
+import numpy as np
+
+
+NEAR_DUPLICATE_THRESHOLD = 0.92
+
+
+def mmr_select(vectors, relevance, diversity, duplicate_threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Order candidates by MMR and drop near-duplicates.
+
+    `vectors` are the (n, dim) L2-normalized candidate vectors and
+    `relevance` their query similarities. Returns the positions of the
+    kept candidates, in selection order.
+    """
+    if not 0.0 <= diversity <= 1.0:
+        raise ValueError(f"diversity must be between 0 and 1, got {diversity}")
+    n = len(relevance)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    relevance = np.asarray(relevance, dtype=np.float32)
+    similarity = vectors @ vectors.T
+
+    available = np.ones(n, dtype=bool)
+    redundancy = np.zeros(n, dtype=np.float32)
+    selected = []
+    while available.any():
+        gain = (1.0 - diversity) * relevance - diversity * redundancy
+        pick = int(np.argmax(np.where(available, gain, -np.inf)))
+        selected.append(pick)
+        available[pick] = False
+        available &= similarity[pick] < duplicate_threshold
+        np.maximum(redundancy, similarity[pick], out=redundancy)
+    return np.array(selected, dtype=np.int64)
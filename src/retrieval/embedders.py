@@ -0,0 +1,228 @@
+"""
+STEP 4 — Embedding Backends
+---------------------------
+Pluggable embedding backends behind a minimal `Embedder` protocol:
+
+- OpenAIEmbedder: production backend (text-embedding-3-small)
+- HashingEmbedder: deterministic, offline hashed n-gram features
+- RecordingEmbedder: records another backend's vectors to disk and
+  replays them later without network access
+
+Every backend exposes `model_name` (used in cache keys and index
+locations), `dim` and `embed(texts) -> float32 array (n, dim)`.
+Backends may also provide a native `async aembed(texts)`; callers fall
+back to running `embed` in a worker thread.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+from typing import List, Protocol
+
+import numpy as np
+
+from src.retrieval.embedding_cache import cache_key
+
+
+DEFAULT_OPENAI_MODEL = "text-embedding-3-small"
+DEFAULT_DIM = 1536
+
+
+class Embedder(Protocol):
+    model_name: str
+    dim: int
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        ...
+
+
+# -------------------------------
+# OpenAI backend
+# -------------------------------
+class OpenAIEmbedder:
+    """Embeddings API backend; clients are created on first call."""
+
+    def __init__(self, model_name=DEFAULT_OPENAI_MODEL, dim=DEFAULT_DIM, client=None, async_client=None):
+        self.model_name = model_name
+        self.dim = dim
+        self._client = client
+        self._async_client = async_client
+        # One async client per event loop: pooled connections cannot outlive their loop
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    def embed(self, texts):
+        response = self.client.embeddings.create(model=self.model_name, input=list(texts))
+        return np.array([r.embedding for r in response.data], dtype=np.float32)
+
+    def async_client(self):
+        if self._async_client is not None:
+            return self._async_client
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self._async_clients[loop] = client
+        return client
+
+    async def aembed(self, texts):
+        response = await self.async_client().embeddings.create(model=self.model_name, input=list(texts))
+        return np.array([r.embedding for r in response.data], dtype=np.float32)
+
+
+# -------------------------------
+# Deterministic offline backend
+# -------------------------------
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """
+    Deterministic hashed n-gram embeddings (no network, no model files).
+
+    Word unigrams/bigrams and character n-grams are hashed into `dim`
+    signed buckets and L2-normalized. Texts sharing terms such as
+    "Article 28" or "ICT third-party" get high cosine similarity, which
+    is enough to exercise indexing and retrieval end to end.
+    """
+
+    def __init__(self, dim=DEFAULT_DIM, char_ngrams=(3, 4)):
+        self.dim = dim
+        self.char_ngrams = tuple(char_ngrams)
+        self.model_name = f"hashing-ngram-{dim}"
+
+    def _features(self, text):
+        words = TOKEN_PATTERN.findall(text.lower())
+        features = [f"w:{w}" for w in words]
+        features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f" {word} "
+            for n in self.char_ngrams:
+                features += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+        return features
+
+    def _hash(self, feature):
+        return int.from_bytes(
+            hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little"
+        )
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.array([self._hash(f) for f in self._features(text)], dtype=np.uint64)
+            if hashes.size == 0:
+                continue
+            buckets = (hashes % np.uint64(self.dim)).astype(np.int64)
+            signs = np.where((hashes >> np.uint64(63)) == 0, 1.0, -1.0).astype(np.float32)
+            np.add.at(vectors[row], buckets, signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+# -------------------------------
+# Recording / replay backend
+# -------------------------------
+class RecordingEmbedder:
+    """
+    Record vectors produced by `inner` to a JSONL file, or replay them.
+
+    - mode="record": embed with `inner`, append new vectors to `path`
+    - mode="replay": serve vectors from `path` only; unknown texts raise KeyError
+
+    Replay keeps the recorded model name, so caches and indexes built
+    during recording are reused as-is.
+    """
+
+    def __init__(self, path, inner=None, mode="replay", model_name=None, dim=None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported recording mode: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("Recording mode requires an inner embedder")
+
+        self.path = path
+        self.inner = inner
+        self.mode = mode
+        self._recorded = {}
+        self._lock = threading.Lock()
+        self._load()
+
+        self.model_name = model_name or (inner.model_name if inner else self._recorded_model())
+        self.dim = dim or (inner.dim if inner else DEFAULT_DIM)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                vector = np.frombuffer(base64.b64decode(entry["vector"]), dtype=np.float32)
+                self._recorded[entry["key"]] = (entry["model"], vector)
+
+    def _recorded_model(self):
+        models = {model for model, _ in self._recorded.values()}
+        if len(models) != 1:
+            raise ValueError(f"Cannot infer model name from recording {self.path}: {sorted(models)}")
+        return models.pop()
+
+    def embed(self, texts):
+        keys = [cache_key(self.model_name, t) for t in texts]
+        missing = [t for t, k in zip(texts, keys) if k not in self._recorded]
+
+        if missing:
+            if self.mode == "replay":
+                raise KeyError(f"{len(missing)} text(s) not found in recording {self.path}")
+            new_vectors = self.inner.embed(missing)
+            with self._lock:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for text, vector in zip(missing, new_vectors):
+                        key = cache_key(self.model_name, text)
+                        vector = np.asarray(vector, dtype=np.float32)
+                        self._recorded[key] = (self.model_name, vector)
+                        f.write(json.dumps({
+                            "key": key,
+                            "model": self.model_name,
+                            "text": text,
+                            "vector": base64.b64encode(vector.tobytes()).decode("ascii"),
+                        }) + "\n")
+
+        return np.vstack([self._recorded[k][1] for k in keys]).astype(np.float32)
+
+
+# -------------------------------
+# Factory
+# -------------------------------
+def embedder_from_env():
+    """
+    Select the backend from RAG_EMBEDDER:
+
+    - "openai" (default)
+    - "hashing"
+    - "replay:<path>" / "record:<path>" (recording wraps OpenAI)
+    """
+    spec = os.getenv("RAG_EMBEDDER", "openai")
+    if spec == "openai":
+        return OpenAIEmbedder()
+    if spec == "hashing":
+        return HashingEmbedder()
+    if spec.startswith("replay:"):
+        return RecordingEmbedder(spec[len("replay:"):], mode="replay")
+    if spec.startswith("record:"):
+        return RecordingEmbedder(spec[len("record:"):], inner=OpenAIEmbedder(), mode="record")
+    raise ValueError(f"Unknown RAG_EMBEDDER: {spec}")
@@ -0,0 +1,140 @@
+"""
+STEP 4 — Query Embedding Cache
+------------------------------
+Two-tier cache for embedding vectors:
+
+- Tier 1: in-process LRU (OrderedDict), bounded by item count
+- Tier 2: on-disk SQLite table, shared across processes and restarts
+
+Entries are keyed by (embedding model, normalized text), so the same
+question reuses its vector regardless of store, filters or top_k.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+EMBEDDING_CACHE_PATH = "data/embedding_cache/embeddings.sqlite"
+MAX_MEMORY_ITEMS = 2048
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different spellings share an entry."""
+    return " ".join(text.split())
+
+
+def cache_key(model, text):
+    return hashlib.sha256(f"{model}|{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    In-process LRU in front of a persistent SQLite store.
+
+    The SQLite connection is opened on first use, never at import time.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_memory_items=MAX_MEMORY_ITEMS):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._conn = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # -------------------------------
+    # Storage
+    # -------------------------------
+    def _connection(self):
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+            )
+        return self._conn
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    # -------------------------------
+    # Public API
+    # -------------------------------
+    def get_many(self, model, texts):
+        """Return a list aligned with `texts`: cached vector or None."""
+        keys = [cache_key(model, t) for t in texts]
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                if key in self._memory and key not in found:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+
+            disk_keys = list({k for k in keys if k not in found})
+            if disk_keys:
+                placeholders = ",".join("?" * len(disk_keys))
+                rows = self._connection().execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    disk_keys,
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32).copy()
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+
+            self.misses += len({k for k in keys if k not in found})
+
+        return [found.get(k) for k in keys]
+
+    def put_many(self, model, texts, vectors):
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = cache_key(model, text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, model, vector.shape[0], vector.tobytes()))
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.commit()
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "api_calls_saved": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_items": len(self._memory),
+        }
+
+    def reset_stats(self):
+        self.memory_hits = self.disk_hits = self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,176 @@
+"""
+STEP 4 — Embedding Pipeline
+---------------------------
+Concurrent, rate-limited embedding of large text lists (index builds):
+
+- token-aware batch packing (max inputs and max estimated tokens per request)
+- configurable number of in-flight requests (thread pool)
+- per-minute request and token budgets (token buckets)
+- retries of transient errors (connection, timeout, 429, 5xx) with
+  exponential backoff and jitter; anything else fails immediately
+- checkpointing: every completed batch is handed to `on_batch`
+  (the embedding cache), so an interrupted build resumes where it stopped
+
+Token counts come from `token_estimate.estimate_tokens`.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+from src.retrieval.transient_errors import is_retryable
+from src.retrieval.token_estimate import estimate_tokens
+
+
+EMBED_CONCURRENCY = int(os.getenv("RAG_EMBED_CONCURRENCY", "4"))
+EMBED_REQUESTS_PER_MINUTE = int(os.getenv("RAG_EMBED_RPM", "3000"))
+EMBED_TOKENS_PER_MINUTE = int(os.getenv("RAG_EMBED_TPM", "1000000"))
+MAX_BATCH_ITEMS = 256
+MAX_BATCH_TOKENS = 100_000
+MAX_INPUT_TOKENS = 8191
+MAX_RETRIES = 6
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+def pack_batches(texts, max_items=MAX_BATCH_ITEMS, max_tokens=MAX_BATCH_TOKENS):
+    """
+    Group text positions into request batches bounded by item count and
+    estimated tokens. Returns a list of (positions, token_estimate).
+    """
+    batches = []
+    positions, tokens = [], 0
+    for pos, text in enumerate(texts):
+        text_tokens = min(estimate_tokens(text), MAX_INPUT_TOKENS)
+        if positions and (len(positions) >= max_items or tokens + text_tokens > max_tokens):
+            batches.append((positions, tokens))
+            positions, tokens = [], 0
+        positions.append(pos)
+        tokens += text_tokens
+    if positions:
+        batches.append((positions, tokens))
+    return batches
+
+
+class RateLimiter:
+    """Token bucket refilled continuously at `per_minute / 60` units per second."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        # A single request larger than the whole budget waits for a full bucket
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait_s = (amount - self.available) / self.rate
+            time.sleep(wait_s)
+
+
+class EmbeddingPipeline:
+    """
+    Embed texts with `embed_fn(texts) -> (n, dim) array` through a pool of
+    `concurrency` workers, within request/token budgets, retrying batches
+    that failed transiently with exponential backoff.
+    """
+
+    def __init__(self, embed_fn, concurrency=EMBED_CONCURRENCY,
+                 requests_per_minute=EMBED_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=EMBED_TOKENS_PER_MINUTE,
+                 max_batch_items=MAX_BATCH_ITEMS, max_batch_tokens=MAX_BATCH_TOKENS,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE_SECONDS,
+                 backoff_max=BACKOFF_MAX_SECONDS, sleep=time.sleep):
+        self.embed_fn = embed_fn
+        self.concurrency = max(1, concurrency)
+        self.request_limiter = RateLimiter(requests_per_minute)
+        self.token_limiter = RateLimiter(tokens_per_minute)
+        self.max_batch_items = max_batch_items
+        self.max_batch_tokens = max_batch_tokens
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.stats = {"batches": 0, "texts": 0, "tokens": 0, "retries": 0}
+        self._stats_lock = threading.Lock()
+
+    def _embed_with_retry(self, texts, tokens):
+        for attempt in range(self.max_retries + 1):
+            self.request_limiter.acquire(1)
+            self.token_limiter.acquire(tokens)
+            try:
+                return np.asarray(self.embed_fn(texts), dtype=np.float32)
+            except Exception as error:
+                if attempt == self.max_retries or not is_retryable(error):
+                    raise
+                with self._stats_lock:
+                    self.stats["retries"] += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                self.sleep(delay * random.uniform(0.5, 1.0))
+
+    def run(self, texts, on_batch=None):
+        """
+        Embed `texts` and return their vectors in input order.
+
+        `on_batch(batch_texts, batch_vectors)` is called from the calling
+        thread as each batch completes. If a batch still fails after
+        `max_retries`, its error is raised; batches already passed to
+        `on_batch` are kept.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        results = [None] * len(texts)
+        batches = iter(pack_batches(texts, self.max_batch_items, self.max_batch_tokens))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = {}
+
+            def submit_next():
+                batch = next(batches, None)
+                if batch is None:
+                    return False
+                positions, tokens = batch
+                batch_texts = [texts[p] for p in positions]
+                future = executor.submit(self._embed_with_retry, batch_texts, tokens)
+                in_flight[future] = (positions, batch_texts, tokens)
+                return True
+
+            # Keep at most `concurrency` requests in flight, so a failure stops the build early
+            while len(in_flight) < self.concurrency and submit_next():
+                pass
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    positions, batch_texts, tokens = in_flight.pop(future)
+                    try:
+                        vectors = future.result()
+                    except Exception:
+                        for pending in in_flight:
+                            pending.cancel()
+                        raise
+                    for pos, vector in zip(positions, vectors):
+                        results[pos] = vector
+                    if on_batch is not None:
+                        on_batch(batch_texts, vectors)
+                    self.stats["batches"] += 1
+                    self.stats["texts"] += len(batch_texts)
+                    self.stats["tokens"] += tokens
+                    submit_next()
+
+        return np.vstack(results).astype(np.float32)
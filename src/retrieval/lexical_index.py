@@ -0,0 +1,112 @@
+"""
+STEP 4 — Lexical (BM25) Index
+-----------------------------
+Compact BM25 inverted index over regulatory chunks, built when chunks
+are persisted and stored as numpy arrays in a single .npz file:
+
+- "terms":     sorted vocabulary (unigrams + adjacent bigrams)
+- "indptr":    CSR offsets into the postings, one slot per term
+- "doc_ids":   posting doc ids (int32)
+- "tfs":       posting term frequencies (float32)
+- "doc_len":   document lengths in tokens
+- "chunk_ids": chunk id of every doc, in chunk-file order
+
+Bigrams keep exact regulatory phrases ("article 28", "third party")
+searchable. This module only depends on numpy so it can be used from
+the chunking pipeline as well as from retrieval.
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    words = TOKEN_PATTERN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def bm25_path_for(chunk_path):
+    """data/processed/chunks/dora_articles.json -> .../dora_articles_bm25.npz"""
+    chunk_path = str(chunk_path)
+    stem = chunk_path[:-len(".json")] if chunk_path.endswith(".json") else chunk_path
+    return f"{stem}_bm25.npz"
+
+
+def build_bm25_arrays(chunks):
+    doc_terms = [Counter(tokenize(c["text"])) for c in chunks]
+    terms = sorted({t for counts in doc_terms for t in counts})
+    term_ids = {t: i for i, t in enumerate(terms)}
+
+    postings = [[] for _ in terms]
+    for doc_id, counts in enumerate(doc_terms):
+        for term, tf in counts.items():
+            postings[term_ids[term]].append((doc_id, tf))
+
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(p) for p in postings])
+    doc_ids = np.fromiter((d for p in postings for d, _ in p), dtype=np.int32, count=indptr[-1])
+    tfs = np.fromiter((tf for p in postings for _, tf in p), dtype=np.float32, count=indptr[-1])
+
+    return {
+        "terms": np.array(terms, dtype=str),
+        "indptr": indptr,
+        "doc_ids": doc_ids,
+        "tfs": tfs,
+        "doc_len": np.array([sum(c.values()) for c in doc_terms], dtype=np.int32),
+        "chunk_ids": np.array([c["chunk_id"] for c in chunks], dtype=str),
+    }
+
+
+def save_bm25_index(chunks, path):
+    np.savez_compressed(path, **build_bm25_arrays(chunks))
+
+
+class BM25Index:
+    """Vectorized BM25 scorer over the CSR postings arrays."""
+
+    def __init__(self, arrays):
+        self.terms = arrays["terms"]
+        self.indptr = arrays["indptr"]
+        self.doc_ids = arrays["doc_ids"]
+        self.tfs = arrays["tfs"]
+        self.doc_len = arrays["doc_len"].astype(np.float32)
+        self.chunk_ids = [str(c) for c in arrays["chunk_ids"]]
+        self._term_ids = {str(t): i for i, t in enumerate(self.terms)}
+
+        n_docs = len(self.doc_len)
+        df = np.diff(self.indptr).astype(np.float32)
+        self.idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_len = self.doc_len.mean() if n_docs else 1.0
+        self._len_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len / avg_len)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({k: data[k] for k in data.files})
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        return cls(build_bm25_arrays(chunks))
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def score(self, query_text):
+        """BM25 score of every document for the query (float32, doc order)."""
+        scores = np.zeros(len(self.doc_len), dtype=np.float32)
+        for term, qtf in Counter(tokenize(query_text)).items():
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            start, stop = self.indptr[term_id], self.indptr[term_id + 1]
+            docs = self.doc_ids[start:stop]
+            tf = self.tfs[start:stop]
+            scores[docs] += qtf * self.idf[term_id] * tf * (BM25_K1 + 1) / (tf + self._len_norm[docs])
+        return scores
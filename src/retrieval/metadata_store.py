@@ -0,0 +1,142 @@
+"""
+STEP 4 — Columnar Chunk Metadata
+--------------------------------
+Compact on-disk / in-memory layout for a store's chunk metadata,
+replacing the pickled (and JSON-mirrored) list of dicts:
+
+- <store>_meta.npz: chunk ids, one int32 code column per field
+  (dictionary-encoded, -1 = field absent) and the field categories
+- <store>_text.bin: all chunk texts as one UTF-8 blob, indexed by
+  the "text_offsets" column and read on demand through mmap
+
+Repeated values such as `authority` or `document_title` are stored once
+per store instead of once per chunk. `ColumnarMetadata` still behaves
+like the historical list of dicts (len, index, iterate), so existing
+callers keep working; rows are materialized only when accessed.
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+TEXT_FIELD = "text"
+ID_FIELD = "chunk_id"
+
+
+def metadata_paths(base_path):
+    """data/faiss/dora -> (data/faiss/dora_meta.npz, data/faiss/dora_text.bin)"""
+    return f"{base_path}_meta.npz", f"{base_path}_text.bin"
+
+
+def encode_columns(metadata):
+    """Dictionary-encode a list of chunk dicts into column arrays and a text blob."""
+    fields = []
+    for chunk in metadata:
+        for field in chunk:
+            if field not in (ID_FIELD, TEXT_FIELD) and field not in fields:
+                fields.append(field)
+
+    categories = {field: {} for field in fields}
+    codes = {field: np.full(len(metadata), -1, dtype=np.int32) for field in fields}
+    texts = []
+    for row, chunk in enumerate(metadata):
+        for field in fields:
+            if field in chunk:
+                value_key = json.dumps(chunk[field])
+                codes[field][row] = categories[field].setdefault(value_key, len(categories[field]))
+        texts.append(chunk.get(TEXT_FIELD, "").encode("utf-8"))
+
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(t) for t in texts])
+    schema = {
+        "fields": fields,
+        "categories": {field: list(values) for field, values in categories.items()},
+    }
+    columns = {
+        "chunk_ids": np.array([chunk[ID_FIELD] for chunk in metadata], dtype=str),
+        "text_offsets": offsets,
+        "schema": np.array(json.dumps(schema)),
+        **{f"codes:{field}": column for field, column in codes.items()},
+    }
+    return columns, b"".join(texts)
+
+
+def write_columns(columns, path):
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **columns)
+
+
+def write_text_blob(blob, path):
+    with open(path, "wb") as f:
+        f.write(blob)
+
+
+class ColumnarMetadata:
+    """
+    Read-only, list-like view over columnar chunk metadata.
+
+    Only ids, codes and offsets live in memory; texts stay in the
+    memory-mapped blob until a row (or `text(row)`) is requested.
+    """
+
+    def __init__(self, columns, text_blob):
+        schema = json.loads(str(columns["schema"]))
+        self.fields = schema["fields"]
+        self.categories = {
+            field: [json.loads(v) for v in values] for field, values in schema["categories"].items()
+        }
+        self.codes = {field: columns[f"codes:{field}"] for field in self.fields}
+        self.chunk_ids = [str(c) for c in columns["chunk_ids"]]
+        self.text_offsets = columns["text_offsets"]
+        self._blob = text_blob
+
+    @classmethod
+    def load(cls, base_path):
+        meta_path, text_path = metadata_paths(base_path)
+        with np.load(meta_path, allow_pickle=False) as data:
+            columns = {k: data[k] for k in data.files}
+        if os.path.getsize(text_path):
+            blob = np.memmap(text_path, dtype=np.uint8, mode="r")
+        else:
+            blob = np.zeros(0, dtype=np.uint8)
+        return cls(columns, blob)
+
+    @staticmethod
+    def exists(base_path):
+        return all(os.path.exists(p) for p in metadata_paths(base_path))
+
+    def __len__(self):
+        return len(self.chunk_ids)
+
+    def text(self, row):
+        start, stop = self.text_offsets[row], self.text_offsets[row + 1]
+        return bytes(self._blob[start:stop]).decode("utf-8")
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        chunk = {ID_FIELD: self.chunk_ids[row]}
+        for field in self.fields:
+            code = self.codes[field][row]
+            if code >= 0:
+                chunk[field] = self.categories[field][code]
+        chunk[TEXT_FIELD] = self.text(row)
+        return chunk
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def value_masks(self, field):
+        """Boolean masks for a field: {"present": rows with the field, "values": {value: rows}}."""
+        codes = self.codes.get(field)
+        if codes is None:
+            return {"present": np.zeros(len(self), dtype=bool), "values": {}}
+        return {
+            "present": codes >= 0,
+            "values": {value: codes == code for code, value in enumerate(self.categories[field])},
+        }
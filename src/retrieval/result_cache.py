@@ -0,0 +1,236 @@
+"""
+STEP 4 — Result Cache Store
+---------------------------
+Single SQLite-backed cache for retrieval results and generated answers,
+replacing the per-query .pkl / .json files:
+
+- entries live in one table, keyed by (namespace, key)
+- values are stored as JSON (no unpickling on lookup)
+- every write is one SQLite transaction (atomic, safe across processes)
+- TTL per entry, LRU eviction once the byte budget is exceeded; hits
+  refresh an entry's access time at most every ACCESS_TOUCH_SECONDS, so
+  the read path rarely writes
+- hit / miss counters per namespace
+
+Usage:
+    python -m src.retrieval.result_cache stats
+    python -m src.retrieval.result_cache prune --max-bytes 50000000
+    python -m src.retrieval.result_cache prune --namespace answers --all
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+
+RESULT_CACHE_PATH = os.getenv("RAG_RESULT_CACHE_PATH", "data/cache/results.sqlite")
+MAX_CACHE_BYTES = int(os.getenv("RAG_RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DEFAULT_TTL_SECONDS = int(os.getenv("RAG_RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+ACCESS_TOUCH_SECONDS = int(os.getenv("RAG_RESULT_CACHE_TOUCH_SECONDS", "300"))
+
+
+class ResultCache:
+    """
+    Namespaced JSON cache with TTL and LRU eviction under a byte budget.
+
+    The SQLite connection is opened on first use, never at import time.
+    `ttl_seconds=0` disables expiry. LRU order is coarse: a hit only
+    updates the access time once it is `touch_seconds` old.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_bytes=MAX_CACHE_BYTES,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, touch_seconds=ACCESS_TOUCH_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.touch_seconds = touch_seconds
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = 0
+
+    # -------------------------------
+    # Storage
+    # -------------------------------
+    def _connection(self):
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+                "expires_at REAL, PRIMARY KEY (namespace, key))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _expires_at(self, now, ttl_seconds):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        return now + ttl if ttl else None
+
+    def _evict(self, conn, max_bytes):
+        """Delete least recently used entries until the store fits `max_bytes`."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+
+        removed = 0
+        for namespace, key, size in conn.execute(
+            "SELECT namespace, key, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            if total <= max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+            total -= size
+            removed += 1
+        return removed
+
+    # -------------------------------
+    # Public API
+    # -------------------------------
+    def get(self, namespace, key):
+        """Return the cached value, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+
+            if row is not None and row[1] is not None and row[1] <= now:
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                conn.commit()
+                row = None
+
+            if row is None:
+                self.misses[namespace] += 1
+                return None
+
+            # Skip the write while the recorded access is recent enough for LRU
+            if now - row[2] >= self.touch_seconds:
+                conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key),
+                )
+                conn.commit()
+            self.hits[namespace] += 1
+        return json.loads(row[0])
+
+    def contains(self, namespace, key):
+        """Presence check without touching LRU order or hit counters."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        return row is not None and (row[0] is None or row[0] > time.time())
+
+    def set(self, namespace, key, value, ttl_seconds=None):
+        blob = json.dumps(value).encode("utf-8")
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(namespace, key, value, size, created_at, accessed_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (namespace, key, blob, len(blob), now, now, self._expires_at(now, ttl_seconds)),
+                )
+                self.evictions += self._evict(conn, self.max_bytes)
+
+    def prune(self, max_bytes=None, namespace=None, clear=False):
+        """
+        Remove expired entries, then evict LRU entries down to `max_bytes`
+        (default: the configured budget). `clear=True` empties the namespace
+        (or the whole store). Returns the number of removed entries.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if clear:
+                    if namespace is None:
+                        return conn.execute("DELETE FROM entries").rowcount
+                    return conn.execute(
+                        "DELETE FROM entries WHERE namespace = ?", (namespace,)
+                    ).rowcount
+                removed = conn.execute(
+                    "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                    (time.time(),),
+                ).rowcount
+                removed += self._evict(conn, self.max_bytes if max_bytes is None else max_bytes)
+        return removed
+
+    def stats(self):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT namespace, COUNT(*), SUM(size), SUM(expires_at IS NOT NULL AND expires_at <= ?) "
+                "FROM entries GROUP BY namespace",
+                (time.time(),),
+            ).fetchall()
+
+        namespaces = {}
+        for namespace, entries, size, expired in rows:
+            namespaces[namespace] = {"entries": entries, "bytes": size, "expired": expired}
+        for namespace in set(self.hits) | set(self.misses) | set(namespaces):
+            entry = namespaces.setdefault(namespace, {"entries": 0, "bytes": 0, "expired": 0})
+            lookups = self.hits[namespace] + self.misses[namespace]
+            entry["hits"] = self.hits[namespace]
+            entry["misses"] = self.misses[namespace]
+            entry["hit_rate"] = round(self.hits[namespace] / lookups, 4) if lookups else 0.0
+
+        return {
+            "path": self.path,
+            "total_bytes": sum(n["bytes"] for n in namespaces.values()),
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+            "namespaces": namespaces,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# -------------------------------
+# CLI
+# -------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or prune the retrieval/answer cache")
+    parser.add_argument("--path", default=RESULT_CACHE_PATH)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Entries, bytes and expired entries per namespace")
+
+    prune = subparsers.add_parser("prune", help="Drop expired entries and evict down to a byte budget")
+    prune.add_argument("--max-bytes", type=int, default=None)
+    prune.add_argument("--namespace", default=None, help="Namespace for --all")
+    prune.add_argument("--all", action="store_true", help="Remove every entry (of --namespace)")
+
+    args = parser.parse_args()
+    cache = ResultCache(path=args.path)
+
+    if args.command == "prune":
+        removed = cache.prune(max_bytes=args.max_bytes, namespace=args.namespace, clear=args.all)
+        print(f"Removed {removed} entries")
+    print(json.dumps(cache.stats(), indent=2))
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,100 @@
+import asyncio
+import functools
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import faiss
 import numpy as np
-from openai import OpenAI
 import hashlib
 import pickle
 
+from src.retrieval.chunk_registry import ChunkRegistry
+from src.retrieval.embedding_cache import EmbeddingCache
+from src.retrieval.diversity import mmr_select
+from src.retrieval.embedding_pipeline import EmbeddingPipeline
+from src.retrieval.metadata_store import (
+    ColumnarMetadata, encode_columns, metadata_paths, write_columns, write_text_blob,
+)
+from src.retrieval.result_cache import ResultCache
+from src.retrieval.single_flight import SingleFlight
+from src.retrieval.embedders import embedder_from_env
+from src.retrieval.ann_index import (
+    FLAT_SPEC, build_index, is_lossless, prepare_vectors, resolve_spec, search_parameters, stored_vectors
+)
+from src.retrieval.lexical_index import BM25Index, bm25_path_for
+
 # -------------------------------
 # Configuration
 # -------------------------------
 CHUNK_PATH = "data/processed/chunks/"
 VECTOR_DIM = 1536
+EMBEDDING_MODEL = "text-embedding-3-small"
 BATCH_SIZE = 50
 K_NEAREST = 5
 SIMILARITY_THRESHOLD = 0.55
 
 FAISS_PATH = "data/faiss"
-CACHE_PATH = "data/retrieval_cache"
-os.makedirs(FAISS_PATH, exist_ok=True)
-os.makedirs(CACHE_PATH, exist_ok=True)
+RESULT_CACHE_NAMESPACE = "retrieval"
+
+CHUNK_FILES = {
+    "cssf": "cssf_sections.json",
+    "dora": "dora_articles.json",
+    "eba": "eba_paragraphs.json",
+}
+
+FILTER_FIELDS = ("authority", "jurisdiction", "binding_level")
+
+# Search all regulators in one pass (one query, per-store quotas) instead of one retrieve per store
+USE_UNIFIED_INDEX = os.getenv("RAG_UNIFIED_INDEX", "0") == "1"
+
+# Hybrid (BM25 + dense) retrieval
+HYBRID_ALPHA = 0.7          # weight of cosine similarity vs normalized BM25
+HYBRID_CANDIDATES = 50      # candidates taken from each side before fusion
+LEXICAL_MIN_SCORE = 0.5     # normalized BM25 that admits a hit below SIMILARITY_THRESHOLD
+
+# Index type per store (see src/retrieval/ann_index.py); unlisted stores use Flat
+INDEX_SPECS = {
+    "cssf": FLAT_SPEC,
+    "dora": FLAT_SPEC,
+    "eba": FLAT_SPEC,
+}
+
+# Memory-map vectors and indexes read-only so that several worker processes
+# share one page-cache copy instead of each holding its own.
+USE_MMAP = os.getenv("RAG_VECTOR_MMAP", "0") == "1"
+FAISS_MMAP_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+
+# Worker threads for the blocking parts (store loading, cache I/O, FAISS search)
+# of async retrieval; FAISS releases the GIL while searching.
+SEARCH_THREADS = int(os.getenv("RAG_SEARCH_THREADS", "8"))
+
+# Embedding backend is selected on first embedding call, not at import time
+_embedder = None
+
+def get_embedder():
+    global _embedder
+    if _embedder is None:
+        _embedder = embedder_from_env()
+    return _embedder
+
+def set_embedder(embedder):
+    """
+    Switch the embedding backend (e.g. to HashingEmbedder for offline runs).
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    Loaded stores are released, since their vectors belong to the previous model.
+    """
+    global _embedder
+    _embedder = embedder
+    vector_store.close()
+
+def index_dir():
+    """Index location for the active embedder; non-default models get a subfolder."""
+    model_name = get_embedder().model_name
+    if model_name == EMBEDDING_MODEL:
+        return FAISS_PATH
+    return os.path.join(FAISS_PATH, model_name)
 
 # -------------------------------
 # 1. Load chunks
@@ -31,69 +104,504 @@ def load_chunks(filename):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-chunks_cssf = load_chunks("cssf_sections.json")
-chunks_dora = load_chunks("dora_articles.json")
-chunks_eba = load_chunks("eba_paragraphs.json")
-
-vector_store = {
-    "cssf": {"vectors": None, "ids": [], "metadata": []},
-    "dora": {"vectors": None, "ids": [], "metadata": []},
-    "eba": {"vectors": None, "ids": [], "metadata": []},
-}
-
 # -------------------------------
 # 2. Embeddings
 # -------------------------------
+embedding_cache = EmbeddingCache()
+
+def _embed_batch_uncached(text_list):
+    return np.asarray(get_embedder().embed(text_list), dtype=np.float32)
+
 def embed_batch(text_list):
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text_list
-    )
-    return np.array([r.embedding for r in response.data], dtype=np.float32)
+    """
+    Embed a list of texts, serving repeated texts from the embedding cache.
+
+    Only cache misses (deduplicated) are sent to the embeddings API.
+    """
+    model_name = get_embedder().model_name
+    if not text_list:
+        return np.zeros((0, get_embedder().dim), dtype=np.float32)
+
+    vectors = embedding_cache.get_many(model_name, text_list)
+    missing = {}
+    for i, v in enumerate(vectors):
+        if v is None:
+            missing.setdefault(text_list[i], []).append(i)
+
+    if missing:
+        texts = list(missing)
+        new_vectors = _embed_batch_uncached(texts)
+        embedding_cache.put_many(model_name, texts, new_vectors)
+        for text, vector in zip(texts, new_vectors):
+            for i in missing[text]:
+                vectors[i] = vector
+
+    return np.vstack(vectors).astype(np.float32)
 
 def embed_text(text):
     return embed_batch([text])[0]
 
-def process_chunks_batch(chunks, store_key):
-    vectors = []
-    for i in range(0, len(chunks), BATCH_SIZE):
-        batch = chunks[i:i + BATCH_SIZE]
-        texts = [c["text"] for c in batch]
-        batch_vectors = embed_batch(texts)
-        vectors.append(batch_vectors)
-        for c in batch:
-            vector_store[store_key]["ids"].append(c["chunk_id"])
-            vector_store[store_key]["metadata"].append(c)
-
-    vector_store[store_key]["vectors"] = np.vstack(vectors)
-    faiss.normalize_L2(vector_store[store_key]["vectors"])
-
-def build_or_load_index(store_key, chunks):
-    index_file = os.path.join(FAISS_PATH, f"{store_key}.index")
-    meta_file = os.path.join(FAISS_PATH, f"{store_key}_metadata.pkl")
-    vector_file = os.path.join(FAISS_PATH, f"{store_key}_vectors.npy")
-
-    if os.path.exists(index_file) and os.path.exists(meta_file) and os.path.exists(vector_file):
-        index = faiss.read_index(index_file)
-        vector_store[store_key]["metadata"] = pickle.load(open(meta_file, "rb"))
-        vector_store[store_key]["ids"] = [c["chunk_id"] for c in vector_store[store_key]["metadata"]]
-        vector_store[store_key]["vectors"] = np.load(vector_file)
-        return index
-
-    process_chunks_batch(chunks, store_key)
-    index = faiss.IndexFlatIP(VECTOR_DIM)
-    index.add(vector_store[store_key]["vectors"])
-
-    faiss.write_index(index, index_file)
-    pickle.dump(vector_store[store_key]["metadata"], open(meta_file, "wb"))
-    np.save(vector_file, vector_store[store_key]["vectors"])
+def embed_many(text_list, pipeline=None):
+    """
+    Embed a large list of texts (index builds) through the concurrent,
+    rate-limited `EmbeddingPipeline`.
+
+    Cached texts are skipped and every completed batch is written to the
+    embedding cache right away, so an interrupted build resumes from the
+    last finished batch instead of starting over.
+    """
+    model_name = get_embedder().model_name
+    if not text_list:
+        return np.zeros((0, get_embedder().dim), dtype=np.float32)
+
+    vectors = embedding_cache.get_many(model_name, text_list)
+    missing = {}
+    for i, v in enumerate(vectors):
+        if v is None:
+            missing.setdefault(text_list[i], []).append(i)
+
+    if missing:
+        pipeline = pipeline or EmbeddingPipeline(_embed_batch_uncached)
+        texts = list(missing)
+        new_vectors = pipeline.run(
+            texts, on_batch=lambda batch, batch_vectors: embedding_cache.put_many(model_name, batch, batch_vectors)
+        )
+        for text, vector in zip(texts, new_vectors):
+            for i in missing[text]:
+                vectors[i] = vector
+
+    return np.vstack(vectors).astype(np.float32)
+
+_search_executor = None
+_executor_lock = threading.Lock()
+
+def search_executor():
+    global _search_executor
+    with _executor_lock:
+        if _search_executor is None:
+            _search_executor = ThreadPoolExecutor(max_workers=SEARCH_THREADS, thread_name_prefix="rag-search")
+    return _search_executor
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call in the search thread pool without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(search_executor(), functools.partial(fn, *args, **kwargs))
+
+async def _aembed_batch_uncached(text_list):
+    embedder = get_embedder()
+    if hasattr(embedder, "aembed"):
+        vectors = await embedder.aembed(text_list)
+    else:
+        vectors = await run_blocking(embedder.embed, text_list)
+    return np.asarray(vectors, dtype=np.float32)
+
+async def aembed_batch(text_list):
+    """
+    Async `embed_batch`: cache lookups run in the search thread pool and
+    cache misses go through the backend's native `aembed` when it has one.
+    """
+    model_name = get_embedder().model_name
+    if not text_list:
+        return np.zeros((0, get_embedder().dim), dtype=np.float32)
+
+    vectors = await run_blocking(embedding_cache.get_many, model_name, text_list)
+    missing = {}
+    for i, v in enumerate(vectors):
+        if v is None:
+            missing.setdefault(text_list[i], []).append(i)
+
+    if missing:
+        texts = list(missing)
+        new_vectors = await _aembed_batch_uncached(texts)
+        await run_blocking(embedding_cache.put_many, model_name, texts, new_vectors)
+        for text, vector in zip(texts, new_vectors):
+            for i in missing[text]:
+                vectors[i] = vector
+
+    return np.vstack(vectors).astype(np.float32)
+
+async def aembed_text(text):
+    return (await aembed_batch([text]))[0]
+
+def new_store():
+    return {
+        "vectors": None, "ids": [], "metadata": [], "filter_masks": {},
+        "index": None, "index_spec": FLAT_SPEC, "fingerprint": None, "registry": None,
+    }
+
+def process_chunks_batch(chunks, store):
+    for c in chunks:
+        store["ids"].append(c["chunk_id"])
+        store["metadata"].append(c)
+
+    store["vectors"] = embed_many([c["text"] for c in chunks])
+    faiss.normalize_L2(store["vectors"])
+
+def build_filter_masks(metadata):
+    """
+    Precompute boolean row masks per filter field, aligned with the FAISS row ids.
+
+    For every field in FILTER_FIELDS:
+    - "present": rows that carry the field at all
+    - "values": {value: rows whose field equals value}
+    """
+    if isinstance(metadata, ColumnarMetadata):
+        return {field: metadata.value_masks(field) for field in FILTER_FIELDS}
+
+    n_rows = len(metadata)
+    masks = {}
+    for field in FILTER_FIELDS:
+        present = np.zeros(n_rows, dtype=bool)
+        values = {}
+        for row_id, c in enumerate(metadata):
+            if field not in c:
+                continue
+            present[row_id] = True
+            value = c[field]
+            if value not in values:
+                values[value] = np.zeros(n_rows, dtype=bool)
+            values[value][row_id] = True
+        masks[field] = {"present": present, "values": values}
+    return masks
+
+def store_fingerprint(metadata, model_name):
+    """
+    Content fingerprint of a store: hash of every chunk id, text and
+    metadata field, in row order, plus the embedding model. Re-chunking,
+    re-embedding or re-tagging a store (e.g. a corrected `binding_level`)
+    changes it; untouched stores keep theirs.
+    """
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for c in metadata:
+        fields = {k: v for k, v in c.items() if k not in ("chunk_id", "text")}
+        digest.update(b"\x00" + c["chunk_id"].encode("utf-8") + b"\x00" + c["text"].encode("utf-8"))
+        digest.update(b"\x00" + json.dumps(fields, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def search_fingerprint(fingerprint, index_spec):
+    """
+    Fingerprint of a store as searched: its content fingerprint plus the
+    resolved index spec, since results also depend on index type, vector
+    storage and truncation.
+    """
+    spec = json.dumps(index_spec, sort_keys=True).encode("utf-8")
+    return f"{fingerprint}-{hashlib.sha256(spec).hexdigest()[:8]}"
+
+def chunk_hash(chunk):
+    """Content hash of the embedded text of a chunk (its vector depends on nothing else)."""
+    return hashlib.sha256(chunk["text"].encode("utf-8")).hexdigest()
+
+def read_manifest(manifest_file):
+    # Stores persisted before manifests existed are plain Flat indexes
+    if not os.path.exists(manifest_file):
+        return {"index_spec": FLAT_SPEC}
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def write_manifest(manifest_file, store_key, store):
+    manifest = {
+        "store_key": store_key,
+        "index_spec": store["index_spec"],
+        "embedding_model": get_embedder().model_name,
+        "fingerprint": store["fingerprint"],
+        "n_vectors": int(store["index"].ntotal),
+        "dim": int(store["index"].d),
+        "created_at": datetime.now().isoformat(),
+    }
+    atomic_write(manifest_file, lambda tmp: _dump_json(manifest, tmp))
+
+def _dump_json(obj, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2)
+
+def atomic_write(path, write):
+    """Write through `write(tmp_path)` and move into place, so readers never see partial files."""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def store_files(store_key):
+    faiss_path = index_dir()
+    columns_base = os.path.join(faiss_path, store_key)
+    columns_file, texts_file = metadata_paths(columns_base)
+    return {
+        "index": os.path.join(faiss_path, f"{store_key}.index"),
+        "columns_base": columns_base,
+        "columns": columns_file,
+        "texts": texts_file,
+        "metadata": os.path.join(faiss_path, f"{store_key}_metadata.pkl"),
+        "metadata_json": os.path.join(faiss_path, f"{store_key}_metadata.json"),
+        "vectors": os.path.join(faiss_path, f"{store_key}_vectors.npy"),
+        "manifest": os.path.join(faiss_path, f"{store_key}_manifest.json"),
+    }
+
+def persist_store(store_key, store):
+    """
+    Write index, columnar metadata and manifest of a store.
+
+    The index is the only persisted copy of the vectors; legacy
+    `{store_key}_vectors.npy` and pickled / JSON metadata files are
+    removed. Every file is replaced atomically; the manifest is written last.
+    """
+    files = store_files(store_key)
+    os.makedirs(os.path.dirname(files["index"]), exist_ok=True)
+    columns, text_blob = encode_columns(list(store["metadata"]))
+    atomic_write(files["texts"], lambda tmp: write_text_blob(text_blob, tmp))
+    atomic_write(files["columns"], lambda tmp: write_columns(columns, tmp))
+    atomic_write(files["index"], lambda tmp: faiss.write_index(store["index"], tmp))
+    write_manifest(files["manifest"], store_key, store)
+    for legacy in ("vectors", "metadata", "metadata_json"):
+        if os.path.exists(files[legacy]):
+            os.remove(files[legacy])
+
+def has_metadata(files):
+    return ColumnarMetadata.exists(files["columns_base"]) or os.path.exists(files["metadata"])
+
+def load_metadata(files):
+    """Columnar metadata of a store, or the legacy pickled list of dicts."""
+    if ColumnarMetadata.exists(files["columns_base"]):
+        return ColumnarMetadata.load(files["columns_base"])
+    with open(files["metadata"], "rb") as f:
+        return pickle.load(f)
+
+def build_or_load_index(store_key, chunks=None, store=None, mmap=False, index_spec=None):
+    """
+    Load the persisted index of a store, or embed its chunks and persist it.
+
+    `store` is filled in place (vectors, ids, metadata, filter masks, index).
+    Chunks are only read from CHUNK_PATH when the index has to be built.
+    `store["vectors"]` is a read-only view of the vectors held by the index
+    (decoded when the storage is quantized).
+
+    Metadata is columnar (see `metadata_store`): ids and filter fields are
+    held as compact arrays, chunk texts are memory-mapped and decoded only
+    for the rows that are accessed. Stores still persisted as pickled
+    metadata are read as before and converted on their next write.
+
+    With `mmap=True` the index is memory-mapped read-only as well, so
+    processes sharing the same files share the same pages.
+
+    `index_spec` (default: INDEX_SPECS[store_key]) selects Flat, HNSW or
+    IVF-PQ, the vector storage and optional dimension truncation. The
+    resolved spec is kept in `{store_key}_manifest.json`; when it differs
+    from the persisted one, the index is rebuilt from the stored vectors
+    if they are lossless and wide enough, otherwise from the embedding cache.
+    """
+    if store is None:
+        store = new_store()
+    if index_spec is None:
+        index_spec = INDEX_SPECS.get(store_key, FLAT_SPEC)
+
+    files = store_files(store_key)
+    index_file = files["index"]
+    manifest_file = files["manifest"]
+
+    if os.path.exists(index_file) and has_metadata(files):
+        store["metadata"] = load_metadata(files)
+        store["ids"] = list(ChunkRegistry.ids_of(store["metadata"]))
+        manifest = read_manifest(manifest_file)
+        # The manifest fingerprint avoids decoding every chunk text at load time
+        if manifest.get("embedding_model") == get_embedder().model_name and manifest.get("fingerprint"):
+            store["fingerprint"] = manifest["fingerprint"]
+        else:
+            store["fingerprint"] = store_fingerprint(store["metadata"], get_embedder().model_name)
+
+        persisted_spec = manifest["index_spec"]
+        index = faiss.read_index(index_file, FAISS_MMAP_FLAGS) if mmap else faiss.read_index(index_file)
+        wanted_spec = resolve_spec(index_spec, index.ntotal, get_embedder().dim)
+        store["index_spec"] = persisted_spec
+        if persisted_spec != wanted_spec:
+            if is_lossless(persisted_spec) and index.d >= wanted_spec.get("truncate_dim", get_embedder().dim):
+                source = np.array(stored_vectors(index))
+            else:
+                source = embed_many([c["text"] for c in store["metadata"]])
+                faiss.normalize_L2(source)
+            index, store["index_spec"] = build_index(wanted_spec, source)
+            store["index"] = index
+            atomic_write(index_file, lambda tmp: faiss.write_index(index, tmp))
+            write_manifest(manifest_file, store_key, store)
+    else:
+        if chunks is None:
+            chunks = load_chunks(CHUNK_FILES[store_key])
+        process_chunks_batch(chunks, store)
+        store["fingerprint"] = store_fingerprint(store["metadata"], get_embedder().model_name)
+        index, store["index_spec"] = build_index(index_spec, store["vectors"])
+        store["index"] = index
+        persist_store(store_key, store)
+        store["metadata"] = load_metadata(files)
+
+    store["vectors"] = stored_vectors(index)
+    store["registry"] = ChunkRegistry(store["metadata"])
+    store["filter_masks"] = build_filter_masks(store["metadata"])
+    store["index"] = index
     return index
 
-faiss_indexes = {
-    "cssf": build_or_load_index("cssf", chunks_cssf),
-    "dora": build_or_load_index("dora", chunks_dora),
-    "eba": build_or_load_index("eba", chunks_eba),
-}
+def update_index(store_key, chunks=None, index_spec=None):
+    """
+    Incrementally rebuild a store after its chunks changed.
+
+    Chunks are diffed by content hash against the persisted store: vectors
+    of unchanged texts are reused, only new or edited chunks are embedded,
+    and the new index is written atomically (see `persist_store`).
+    Vectors are only reused from lossless storage (float32) of a
+    sufficient dimension; float16 and quantized stores re-read them from the embedding
+    cache. A loaded copy of the store is released so the next access reloads it.
+
+    Returns {"store_key", "chunks", "reused", "embedded", "removed", "unchanged"}.
+    """
+    if chunks is None:
+        chunks = load_chunks(CHUNK_FILES[store_key])
+    if index_spec is None:
+        index_spec = INDEX_SPECS.get(store_key, FLAT_SPEC)
+
+    files = store_files(store_key)
+    model_name = get_embedder().model_name
+    manifest = read_manifest(files["manifest"])
+    fingerprint = store_fingerprint(chunks, model_name)
+
+    wanted_spec = resolve_spec(index_spec, len(chunks), get_embedder().dim)
+
+    previous = {}
+    if os.path.exists(files["index"]) and has_metadata(files) \
+            and manifest.get("embedding_model", model_name) == model_name:
+        previous = {chunk_hash(c): row for row, c in enumerate(load_metadata(files))}
+
+    hashes = [chunk_hash(c) for c in chunks]
+    report = {
+        "store_key": store_key,
+        "chunks": len(chunks),
+        "reused": sum(h in previous for h in hashes),
+        "embedded": sum(h not in previous for h in hashes),
+        "removed": len(set(previous) - set(hashes)),
+        "unchanged": False,
+    }
+
+    if manifest.get("fingerprint") == fingerprint and manifest["index_spec"] == wanted_spec:
+        report["unchanged"] = True
+        return report
+
+    old_vectors = None
+    if previous:
+        old_index = faiss.read_index(files["index"])
+        if is_lossless(manifest["index_spec"]) and \
+                old_index.d >= wanted_spec.get("truncate_dim", get_embedder().dim):
+            old_vectors = stored_vectors(old_index)
+    if old_vectors is None:
+        previous = {}
+        report["reused"], report["embedded"] = 0, len(chunks)
+
+    vectors = [prepare_vectors(wanted_spec, old_vectors[previous[h]]) if h in previous else None for h in hashes]
+    delta = [row for row, v in enumerate(vectors) if v is None]
+    if delta:
+        new_vectors = embed_many([chunks[row]["text"] for row in delta])
+        faiss.normalize_L2(new_vectors)
+        for row, vector in zip(delta, prepare_vectors(wanted_spec, new_vectors)):
+            vectors[row] = vector
+
+    store = new_store()
+    store["vectors"] = np.vstack(vectors).astype(np.float32)
+    store["ids"] = [c["chunk_id"] for c in chunks]
+    store["metadata"] = list(chunks)
+    store["fingerprint"] = fingerprint
+    store["index"], store["index_spec"] = build_index(wanted_spec, store["vectors"])
+    persist_store(store_key, store)
+
+    vector_store.close([store_key])
+    return report
+
+# -------------------------------
+# Vector store manager (lazy)
+# -------------------------------
+class VectorStoreManager:
+    """
+    Lazily loads vector stores on first access.
+
+    Importing this module performs no I/O: each store is read (or built)
+    the first time it is requested. `vector_store[store_key]` keeps the
+    historical dict layout ("vectors", "ids", "metadata"), plus a
+    "registry" (ChunkRegistry) for lookups by chunk_id or row id.
+    """
+
+    def __init__(self, store_keys=None, mmap=USE_MMAP):
+        self.store_keys = list(store_keys or CHUNK_FILES)
+        self.mmap = mmap
+        self._stores = {}
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def get(self, store_key):
+        if store_key not in self.store_keys:
+            raise KeyError(f"Unknown vector store: {store_key}")
+        store = self._stores.get(store_key)
+        if store is None:
+            with self._lock:
+                store = self._stores.get(store_key)
+                if store is None:
+                    store = new_store()
+                    build_or_load_index(store_key, store=store, mmap=self.mmap)
+                    self._stores[store_key] = store
+        return store
+
+    __getitem__ = get
+
+    def __contains__(self, store_key):
+        return store_key in self.store_keys
+
+    def __iter__(self):
+        return iter(self.store_keys)
+
+    def keys(self):
+        return list(self.store_keys)
+
+    def is_loaded(self, store_key):
+        return store_key in self._stores
+
+    def fingerprint(self, store_key):
+        """
+        Search fingerprint of a store (see `search_fingerprint`), used in
+        cache keys. Read from the manifest when the store is not loaded yet
+        and its persisted index spec is still the configured one.
+        """
+        store = self._stores.get(store_key)
+        if store is not None:
+            return search_fingerprint(store["fingerprint"], store["index_spec"])
+        fingerprint = self._fingerprints.get(store_key)
+        if fingerprint is None:
+            manifest_file = os.path.join(index_dir(), f"{store_key}_manifest.json")
+            manifest = read_manifest(manifest_file)
+            if manifest.get("embedding_model") == get_embedder().model_name and manifest.get("fingerprint") \
+                    and "n_vectors" in manifest:
+                wanted_spec = resolve_spec(
+                    INDEX_SPECS.get(store_key, FLAT_SPEC), manifest["n_vectors"], get_embedder().dim
+                )
+                if manifest["index_spec"] == wanted_spec:
+                    fingerprint = search_fingerprint(manifest["fingerprint"], wanted_spec)
+            if fingerprint is None:
+                # Loading rebuilds the index if its spec changed
+                store = self.get(store_key)
+                fingerprint = search_fingerprint(store["fingerprint"], store["index_spec"])
+            self._fingerprints[store_key] = fingerprint
+        return fingerprint
+
+    def warmup(self, store_keys=None):
+        """Eagerly load stores (all by default), e.g. at service startup."""
+        for store_key in store_keys or self.store_keys:
+            self.get(store_key)
+        return self
+
+    def close(self, store_keys=None):
+        """Release loaded stores; they are reloaded on next access."""
+        with self._lock:
+            for store_key in list(store_keys or self._stores):
+                self._stores.pop(store_key, None)
+                self._fingerprints.pop(store_key, None)
+
+
+vector_store = VectorStoreManager()
 
 # -------------------------------
 # 3. Hard filtering (SAFE)
@@ -111,36 +619,229 @@ def hard_filter(chunks, authority=None, jurisdiction=None, binding_level=None):
         filtered.append(c)
     return filtered
 
+def filter_mask(store_key, authority=None, jurisdiction=None, binding_level=None):
+    """
+    Vectorized equivalent of `hard_filter` over the precomputed row masks.
+
+    Returns None when no filter applies, otherwise a boolean mask over row ids.
+    Same semantics as `hard_filter`: chunks without authority/jurisdiction are
+    kept, chunks without binding_level are dropped when it is requested.
+    """
+    masks = vector_store[store_key]["filter_masks"]
+    n_rows = len(vector_store[store_key]["ids"])
+    mask = None
+
+    for field, value in (("authority", authority), ("jurisdiction", jurisdiction)):
+        if not value:
+            continue
+        field_masks = masks[field]
+        matches = field_masks["values"].get(value)
+        field_mask = ~field_masks["present"]
+        if matches is not None:
+            field_mask = field_mask | matches
+        mask = field_mask if mask is None else mask & field_mask
+
+    if binding_level:
+        matches = masks["binding_level"]["values"].get(binding_level)
+        field_mask = matches if matches is not None else np.zeros(n_rows, dtype=bool)
+        mask = field_mask if mask is None else mask & field_mask
+
+    return mask
+
 # -------------------------------
 # 4. Retrieval
 # -------------------------------
 def query_hash(query_text, authority, jurisdiction, binding_level, store_key, top_k):
-    key = f"{query_text}|{authority}|{jurisdiction}|{binding_level}|{store_key}|{top_k}"
+    # The store fingerprint covers chunk contents, the embedding model and the
+    # index spec, so re-indexing a store only invalidates that store's entries
+    fingerprint = vector_store.fingerprint(store_key)
+    key = f"{query_text}|{authority}|{jurisdiction}|{binding_level}|{store_key}|{top_k}|{fingerprint}"
     return hashlib.md5(key.encode("utf-8")).hexdigest()
 
+def corpus_fingerprint(store_keys):
+    """Combined fingerprint of several stores (e.g. for cached answers)."""
+    return "-".join(vector_store.fingerprint(store_key) for store_key in store_keys)
+
+def filtered_search(store, query_vecs, k, mask=None):
+    """
+    Search the persistent index of a store, restricted to `mask` rows.
+
+    The filter is pushed down into the index via an ID selector over the
+    row bitmap, so no per-query index is built.
+    """
+    selector = None
+    if mask is not None:
+        bitmap = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+    search_params = search_parameters(store["index_spec"], selector)
+    return store["index"].search(query_vecs, k, params=search_params)
+
+def prepare_queries(store, query_vectors):
+    """Query matrix for a store: L2-normalized and truncated like its stored vectors."""
+    query_vecs = np.array(query_vectors, dtype=np.float32)
+    query_vecs = query_vecs.reshape(-1, query_vecs.shape[-1])
+    faiss.normalize_L2(query_vecs)
+    return np.ascontiguousarray(prepare_vectors(store["index_spec"], query_vecs))
+
+def threshold_hits(distances, indices, threshold):
+    """
+    Cut a (n_queries, k) score matrix at `threshold` in one vectorized pass.
+
+    Returns per-query arrays of row ids and scores, best first, so callers
+    only touch hits that are actually returned.
+    """
+    keep = (indices >= 0) & (distances >= threshold)
+    splits = np.cumsum(keep.sum(axis=1))[:-1]
+    return np.split(indices[keep], splits), np.split(distances[keep], splits)
+
+def diversify(vectors, row_ids, row_scores, diversity):
+    """
+    MMR re-ranking and near-duplicate suppression of one query's hits
+    (see `diversity.py`); `diversity=None` leaves them untouched.
+    """
+    if diversity is None or len(row_ids) < 2:
+        return row_ids, row_scores
+    keep = mmr_select(vectors[row_ids], row_scores, diversity)
+    return row_ids[keep], row_scores[keep]
+
+def search_store(store_key, query_vectors, top_k=K_NEAREST, authority=None,
+                 jurisdiction=None, binding_level=None, threshold=None, diversity=None):
+    """
+    Filtered search of one store for a matrix of query vectors.
+
+    Returns every hit scoring at least `threshold` (default
+    SIMILARITY_THRESHOLD), capped at `top_k`: one list of result dicts
+    per query row, in input order. With `diversity` (0-1) the hits are
+    re-ranked by MMR over the stored vectors and near-duplicates dropped.
+    """
+    if threshold is None:
+        threshold = SIMILARITY_THRESHOLD
+    store = vector_store[store_key]
+    mask = filter_mask(store_key, authority, jurisdiction, binding_level)
+
+    query_vecs = prepare_queries(store, query_vectors)
+    if mask is not None and not mask.any():
+        return [[] for _ in range(len(query_vecs))]
+
+    distances, indices = filtered_search(store, query_vecs, top_k, mask)
+    rows, scores = threshold_hits(distances, indices, threshold)
+    if diversity is not None:
+        rows, scores = zip(*(
+            diversify(store["vectors"], row_ids, row_scores, diversity)
+            for row_ids, row_scores in zip(rows, scores)
+        ))
+
+    metadata = store["metadata"]
+    return [
+        [format_hit(metadata[i], d) for i, d in zip(row_ids.tolist(), row_scores.tolist())]
+        for row_ids, row_scores in zip(rows, scores)
+    ]
+
+def format_hit(chunk, score):
+    return {
+        "chunk_id": chunk["chunk_id"],
+        "source_reference": chunk.get("section_id") or chunk.get("article_number") or chunk.get("paragraph_number"),
+        "similarity_score": float(score)
+    }
+
+def search_unified(query_vector, store_filters, top_k=K_NEAREST, threshold=None, diversity=None):
+    """
+    Search one query vector against several stores, each through its own
+    persisted index (and index spec), with its own filters and top-k quota.
+
+    Every requested store gets its quota (subject to `threshold`, default
+    SIMILARITY_THRESHOLD), so a dominant regulator cannot crowd out the
+    others, and hits are exactly those of `search_store`, which is what
+    lets both paths share cache keys. Returns {store_key: [hits]}.
+    """
+    return {
+        store_key: search_store(
+            store_key, [query_vector], top_k, threshold=threshold, diversity=diversity, **filters
+        )[0]
+        for store_key, filters in store_filters.items()
+    }
+
+def fuse_results(results_by_store):
+    """Merge per-store outputs into one score-ordered list tagged by store."""
+    return sorted(
+        (
+            {**c, "vector_store_key": store_key}
+            for store_key, output in results_by_store.items()
+            for c in output["retrieved_chunks"]
+        ),
+        key=lambda c: c["similarity_score"],
+        reverse=True
+    )
+
+def diversify_fused(fused_chunks, diversity):
+    """
+    Cross-store MMR over fused hits, so text that overlaps between
+    regulators (e.g. DORA articles and EBA paragraphs) is kept once.
+    Skipped when the stores hold vectors of different dimensions.
+    """
+    if diversity is None or len(fused_chunks) < 2:
+        return fused_chunks
+    vectors = []
+    for c in fused_chunks:
+        store = vector_store[c["vector_store_key"]]
+        vectors.append(store["vectors"][store["registry"].row(c["chunk_id"])])
+    if len({v.shape for v in vectors}) > 1:
+        return fused_chunks
+    keep = mmr_select(np.vstack(vectors), [c["similarity_score"] for c in fused_chunks], diversity)
+    return [fused_chunks[i] for i in keep.tolist()]
+
+result_cache = ResultCache()
+retrieval_flight = SingleFlight("retrieval")
+
+def retrieval_cache_key(query_text, vector_store_key, authority=None, jurisdiction=None,
+                        binding_level=None, top_k=K_NEAREST, threshold=None, diversity=None):
+    key = query_hash(query_text, authority, jurisdiction, binding_level, vector_store_key, top_k)
+    if threshold is not None and threshold != SIMILARITY_THRESHOLD:
+        key = f"{key}-t{threshold:g}"
+    if diversity is not None:
+        key = f"{key}-d{diversity:g}"
+    return key
+
 def retrieve(
     query_text,
     vector_store_key,
     authority=None,
     jurisdiction=None,
     binding_level=None,
-    top_k=K_NEAREST
+    top_k=K_NEAREST,
+    query_vector=None,
+    threshold=None,
+    diversity=None
 ):
-    cache_file = os.path.join(
-        CACHE_PATH,
-        f"{query_hash(query_text, authority, jurisdiction, binding_level, vector_store_key, top_k)}.pkl"
+    """
+    Filtered top-k retrieval from one vector store.
+
+    Returns all chunks scoring at least `threshold` (default
+    SIMILARITY_THRESHOLD), capped at `top_k`. `diversity` (0-1) enables
+    MMR re-ranking with near-duplicate suppression, which may return fewer.
+
+    `query_vector` may carry a precomputed embedding of `query_text`
+    (e.g. shared across stores); otherwise the query is embedded here.
+    Concurrent calls with the same cache key share one search.
+    """
+    cache_key = retrieval_cache_key(
+        query_text, vector_store_key, authority, jurisdiction, binding_level, top_k, threshold, diversity
     )
-    if os.path.exists(cache_file):
-        return pickle.load(open(cache_file, "rb"))
-
-    chunks = hard_filter(
-        vector_store[vector_store_key]["metadata"],
-        authority,
-        jurisdiction,
-        binding_level
+    return retrieval_flight.do(
+        cache_key, load_or_search, cache_key, query_text, vector_store_key, authority, jurisdiction,
+        binding_level, top_k, query_vector, threshold, diversity
     )
 
-    if not chunks:
+def load_or_search(cache_key, query_text, vector_store_key, authority, jurisdiction, binding_level,
+                   top_k, query_vector, threshold, diversity):
+    """`retrieve` body: cached result, or search and cache (no single-flight)."""
+    cached = result_cache.get(RESULT_CACHE_NAMESPACE, cache_key)
+    if cached is not None:
+        return cached
+
+    mask = filter_mask(vector_store_key, authority, jurisdiction, binding_level)
+
+    if mask is not None and not mask.any():
         return {
             "query_id": f"Q_{datetime.now().strftime('%Y%m%d%H%M%S')}",
             "retrieved_chunks": [],
@@ -148,43 +849,358 @@ def retrieve(
             "retrieval_timestamp": datetime.now().isoformat()
         }
 
-    vectors = np.vstack([
-        vector_store[vector_store_key]["vectors"][
-            vector_store[vector_store_key]["ids"].index(c["chunk_id"])
-        ]
-        for c in chunks
-    ])
+    if query_vector is None:
+        query_vector = embed_text(query_text)
 
-    faiss.normalize_L2(vectors)
-    index = faiss.IndexFlatIP(VECTOR_DIM)
-    index.add(vectors)
+    results = search_store(
+        vector_store_key, query_vector, top_k, authority, jurisdiction, binding_level, threshold, diversity
+    )[0]
 
-    query_vec = embed_text(query_text).reshape(1, -1)
-    faiss.normalize_L2(query_vec)
+    output = {
+        "query_id": f"Q_{datetime.now().strftime('%Y%m%d%H%M%S')}",
+        "retrieved_chunks": results,
+        "filters_applied": {"authority": authority, "jurisdiction": jurisdiction},
+        "retrieval_timestamp": datetime.now().isoformat()
+    }
 
-    distances, indices = index.search(query_vec, top_k)
+    result_cache.set(RESULT_CACHE_NAMESPACE, cache_key, output)
+    return output
 
-    results = []
-    for d, i in zip(distances[0], indices[0]):
-        if d < SIMILARITY_THRESHOLD:
-            continue
-        c = chunks[i]
-        results.append({
-            "chunk_id": c["chunk_id"],
-            "source_reference": c.get("section_id") or c.get("article_number") or c.get("paragraph_number"),
-            "similarity_score": float(d)
-        })
+async def aretrieve(
+    query_text,
+    vector_store_key,
+    authority=None,
+    jurisdiction=None,
+    binding_level=None,
+    top_k=K_NEAREST,
+    query_vector=None,
+    threshold=None,
+    diversity=None
+):
+    """
+    Async `retrieve` (same arguments and output).
+
+    The query is embedded through the async embeddings client (only on a
+    result-cache miss); store loading, cache I/O and the FAISS search run
+    in the search thread pool, so concurrent requests share one event loop.
+    Concurrent identical requests share one embedding and search.
+    """
+    # The key needs the store fingerprint, which may load the store
+    cache_key = await run_blocking(
+        retrieval_cache_key,
+        query_text, vector_store_key, authority, jurisdiction, binding_level, top_k, threshold, diversity
+    )
+
+    async def embed_and_search(query_vector):
+        if query_vector is None:
+            if not await run_blocking(result_cache.contains, RESULT_CACHE_NAMESPACE, cache_key):
+                query_vector = await aembed_text(query_text)
 
+        # Already inside this key's flight: search directly, not through `retrieve`
+        return await run_blocking(
+            load_or_search, cache_key, query_text, vector_store_key, authority, jurisdiction,
+            binding_level, top_k, query_vector, threshold, diversity
+        )
+
+    return await retrieval_flight.ado(cache_key, embed_and_search, query_vector)
+
+def lexical_scores(store_key, query_text):
+    """
+    BM25 scores for every row of a store, aligned with its FAISS row ids.
+
+    The BM25 index persisted next to the chunk file is loaded on first use;
+    if it is missing it is built in memory from the store metadata.
+    """
+    store = vector_store[store_key]
+    if store.get("bm25") is None:
+        path = bm25_path_for(os.path.join(CHUNK_PATH, CHUNK_FILES[store_key]))
+        bm25 = BM25Index.load(path) if os.path.exists(path) else BM25Index.from_chunks(store["metadata"])
+        rows = None
+        if bm25.chunk_ids != store["ids"]:
+            rows = store["registry"].rows(bm25.chunk_ids)
+        store["bm25"], store["bm25_rows"] = bm25, rows
+
+    doc_scores = store["bm25"].score(query_text)
+    rows = store["bm25_rows"]
+    if rows is None:
+        return doc_scores
+    scores = np.zeros(len(store["ids"]), dtype=np.float32)
+    valid = rows >= 0
+    scores[rows[valid]] = doc_scores[valid]
+    return scores
+
+def retrieve_hybrid(
+    query_text,
+    vector_store_key,
+    authority=None,
+    jurisdiction=None,
+    binding_level=None,
+    top_k=K_NEAREST,
+    alpha=HYBRID_ALPHA,
+    query_vector=None,
+    threshold=None,
+    diversity=None
+):
+    """
+    Hybrid lexical + dense retrieval from one vector store.
+
+    Dense candidates (filtered index search) and lexical candidates (BM25)
+    are merged, their exact cosine scores computed in one matrix product, and
+    fused as alpha * cosine + (1 - alpha) * BM25 / max(BM25). A hit is kept
+    if its cosine passes `threshold` (default SIMILARITY_THRESHOLD) or its
+    normalized BM25 passes LEXICAL_MIN_SCORE, so exact regulatory terms are
+    not lost to the cutoff. `diversity` re-ranks the fused hits by MMR, as
+    in `search_store`.
+    """
+    if threshold is None:
+        threshold = SIMILARITY_THRESHOLD
+    store = vector_store[vector_store_key]
+    mask = filter_mask(vector_store_key, authority, jurisdiction, binding_level)
     output = {
         "query_id": f"Q_{datetime.now().strftime('%Y%m%d%H%M%S')}",
-        "retrieved_chunks": results,
+        "retrieved_chunks": [],
         "filters_applied": {"authority": authority, "jurisdiction": jurisdiction},
         "retrieval_timestamp": datetime.now().isoformat()
     }
+    if mask is not None and not mask.any():
+        return output
 
-    pickle.dump(output, open(cache_file, "wb"))
+    if query_vector is None:
+        query_vector = embed_text(query_text)
+    query_vec = prepare_queries(store, query_vector)
+
+    bm25 = lexical_scores(vector_store_key, query_text)
+    if mask is not None:
+        bm25 = np.where(mask, bm25, 0.0)
+    bm25_max = bm25.max()
+    bm25_norm = bm25 / bm25_max if bm25_max > 0 else bm25
+
+    n_candidates = min(len(store["ids"]), max(top_k, HYBRID_CANDIDATES))
+    _, dense_rows = filtered_search(store, query_vec, n_candidates, mask)
+    lexical_rows = np.argpartition(-bm25_norm, n_candidates - 1)[:n_candidates]
+    lexical_rows = lexical_rows[bm25_norm[lexical_rows] > 0]
+    candidates = np.union1d(dense_rows[0][dense_rows[0] >= 0], lexical_rows)
+
+    cosine = np.asarray(store["vectors"][candidates]) @ query_vec[0]
+    lexical = bm25_norm[candidates]
+    hybrid = alpha * cosine + (1 - alpha) * lexical
+
+    keep = (cosine >= threshold) | (lexical >= LEXICAL_MIN_SCORE)
+    order = np.argsort(-hybrid[keep], kind="stable")[:top_k]
+    rows, cosine, lexical, hybrid = (a[keep][order] for a in (candidates, cosine, lexical, hybrid))
+    if diversity is not None and len(rows) > 1:
+        picked = mmr_select(store["vectors"][rows], hybrid, diversity)
+        rows, cosine, lexical, hybrid = (a[picked] for a in (rows, cosine, lexical, hybrid))
+
+    output["retrieved_chunks"] = [
+        {
+            **format_hit(store["metadata"][row], cos),
+            "bm25_score": float(lex),
+            "hybrid_score": float(hyb),
+        }
+        for row, cos, lex, hyb in zip(rows, cosine, lexical, hybrid)
+    ]
     return output
 
+def retrieve_unified(query_text, store_filters, top_k=K_NEAREST, query_vector=None,
+                     threshold=None, diversity=None):
+    """
+    Per-store retrieval in one pass: one query embedding and one
+    `search_unified` call for all stores that miss the result cache.
+    Same output (and cache keys) as `retrieve` per store.
+    """
+    results_by_store = {}
+    pending = {}
+    cache_keys = {
+        store_key: retrieval_cache_key(
+            query_text, store_key, top_k=top_k, threshold=threshold, diversity=diversity, **filters
+        )
+        for store_key, filters in store_filters.items()
+    }
+    for store_key, filters in store_filters.items():
+        cached = result_cache.get(RESULT_CACHE_NAMESPACE, cache_keys[store_key])
+        if cached is not None:
+            results_by_store[store_key] = cached
+        else:
+            pending[store_key] = filters
+
+    if pending:
+        if query_vector is None:
+            query_vector = embed_text(query_text)
+        hits = search_unified(query_vector, pending, top_k, threshold, diversity)
+        for store_key, filters in pending.items():
+            output = {
+                "query_id": f"Q_{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                "retrieved_chunks": hits[store_key],
+                "filters_applied": {
+                    "authority": filters.get("authority"),
+                    "jurisdiction": filters.get("jurisdiction"),
+                },
+                "retrieval_timestamp": datetime.now().isoformat()
+            }
+            result_cache.set(RESULT_CACHE_NAMESPACE, cache_keys[store_key], output)
+            results_by_store[store_key] = output
+
+    return {store_key: results_by_store[store_key] for store_key in store_filters}
+
+def retrieve_multi(query_text, store_filters, top_k=K_NEAREST, query_vector=None,
+                   unified=None, threshold=None, diversity=None):
+    """
+    Retrieve from several vector stores with a single query embedding.
+
+    `store_filters` is either a list of store keys or a dict
+    {store_key: {"authority": ..., "jurisdiction": ..., "binding_level": ...}}.
+    The query is embedded at most once, and only if some store misses the
+    result cache.
+
+    With `unified=True` (default: USE_UNIFIED_INDEX) all stores that miss
+    the cache are searched in one pass (`search_unified`), with a top-k
+    quota per store.
+
+    `threshold` (default SIMILARITY_THRESHOLD) and `diversity` apply to every
+    store; with `diversity` the fused view is also de-duplicated across
+    stores and ordered by MMR instead of raw score.
+
+    Returns per-store outputs (same contract as `retrieve`) plus a fused,
+    score-ordered view tagged with `vector_store_key`.
+    """
+    if not isinstance(store_filters, dict):
+        store_filters = {store_key: {} for store_key in store_filters}
+    if unified is None:
+        unified = USE_UNIFIED_INDEX
+
+    if unified:
+        results_by_store = retrieve_unified(
+            query_text, store_filters, top_k, query_vector, threshold, diversity
+        )
+    else:
+        results_by_store = {}
+        for store_key, filters in store_filters.items():
+            if query_vector is None and not result_cache.contains(
+                RESULT_CACHE_NAMESPACE,
+                retrieval_cache_key(
+                    query_text, store_key, top_k=top_k, threshold=threshold, diversity=diversity, **filters
+                )
+            ):
+                query_vector = embed_text(query_text)
+            results_by_store[store_key] = retrieve(
+                query_text=query_text,
+                vector_store_key=store_key,
+                top_k=top_k,
+                query_vector=query_vector,
+                threshold=threshold,
+                diversity=diversity,
+                **filters
+            )
+
+    return {
+        "query_id": f"Q_{datetime.now().strftime('%Y%m%d%H%M%S')}",
+        "results_by_store": results_by_store,
+        "fused_chunks": diversify_fused(fuse_results(results_by_store), diversity),
+        "retrieval_timestamp": datetime.now().isoformat()
+    }
+
+async def aretrieve_multi(query_text, store_filters, top_k=K_NEAREST, query_vector=None,
+                          unified=None, threshold=None, diversity=None):
+    """
+    Async `retrieve_multi` (same arguments and output).
+
+    The query is embedded at most once through the async client; the
+    per-store searches then run concurrently in the search thread pool.
+    """
+    if not isinstance(store_filters, dict):
+        store_filters = {store_key: {} for store_key in store_filters}
+    if unified is None:
+        unified = USE_UNIFIED_INDEX
+
+    if query_vector is None:
+        for store_key, filters in store_filters.items():
+            cache_key = await run_blocking(
+                retrieval_cache_key,
+                query_text, store_key, top_k=top_k, threshold=threshold, diversity=diversity, **filters
+            )
+            if not await run_blocking(result_cache.contains, RESULT_CACHE_NAMESPACE, cache_key):
+                query_vector = await aembed_text(query_text)
+                break
+
+    if unified:
+        results_by_store = await run_blocking(
+            retrieve_unified, query_text, store_filters, top_k, query_vector, threshold, diversity
+        )
+    else:
+        outputs = await asyncio.gather(*(
+            aretrieve(
+                query_text=query_text,
+                vector_store_key=store_key,
+                top_k=top_k,
+                query_vector=query_vector,
+                threshold=threshold,
+                diversity=diversity,
+                **filters
+            )
+            for store_key, filters in store_filters.items()
+        ))
+        results_by_store = dict(zip(store_filters, outputs))
+
+    return {
+        "query_id": f"Q_{datetime.now().strftime('%Y%m%d%H%M%S')}",
+        "results_by_store": results_by_store,
+        "fused_chunks": diversify_fused(fuse_results(results_by_store), diversity),
+        "retrieval_timestamp": datetime.now().isoformat()
+    }
+
+def retrieve_many(queries, store_keys, filters=None, top_k=K_NEAREST, threshold=None, diversity=None):
+    """
+    Batch retrieval for offline evaluation and bulk workloads.
+
+    - Queries are embedded in batches of BATCH_SIZE (through the embedding cache)
+    - Each store is searched once with the full query matrix
+    - The per-query result cache is bypassed
+
+    `filters` maps store_key -> {"authority", "jurisdiction", "binding_level"}.
+    Returns one entry per query, in input order, shaped like `retrieve_multi`.
+    """
+    queries = list(queries)
+    filters = filters or {}
+    if not queries:
+        return []
+
+    query_vectors = np.vstack([
+        embed_batch(queries[i:i + BATCH_SIZE])
+        for i in range(0, len(queries), BATCH_SIZE)
+    ])
+
+    per_store = {
+        store_key: search_store(
+            store_key, query_vectors, top_k, threshold=threshold, diversity=diversity,
+            **filters.get(store_key, {})
+        )
+        for store_key in store_keys
+    }
+
+    timestamp = datetime.now().isoformat()
+    outputs = []
+    for q_idx, query_text in enumerate(queries):
+        results_by_store = {}
+        for store_key in store_keys:
+            store_filters = filters.get(store_key, {})
+            results_by_store[store_key] = {
+                "query_id": f"Q_{datetime.now().strftime('%Y%m%d%H%M%S')}_{q_idx}",
+                "retrieved_chunks": per_store[store_key][q_idx],
+                "filters_applied": {
+                    "authority": store_filters.get("authority"),
+                    "jurisdiction": store_filters.get("jurisdiction"),
+                },
+                "retrieval_timestamp": timestamp
+            }
+        outputs.append({
+            "query": query_text,
+            "results_by_store": results_by_store,
+            "fused_chunks": diversify_fused(fuse_results(results_by_store), diversity),
+            "retrieval_timestamp": timestamp
+        })
+    return outputs
+
 # -------------------------------
 # 5. Example usage
 # -------------------------------
@@ -203,8 +1219,7 @@ if __name__ == "__main__":
         if missing:
             raise FileNotFoundError(f"Missing required chunk files: {missing}")
 
-        for folder in [FAISS_PATH, CACHE_PATH]:
-            os.makedirs(folder, exist_ok=True)
+        os.makedirs(FAISS_PATH, exist_ok=True)
 
     # Call at the start
     pre_flight_check()
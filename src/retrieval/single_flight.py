@@ -0,0 +1,162 @@
+"""
+STEP 4 — Single-Flight Request Deduplication
+--------------------------------------------
+Collapses concurrent identical requests (same cache key) into one
+computation, so a burst of analysts asking the same question after a
+regulatory bulletin triggers one retrieval / LLM call instead of one each:
+
+- in-process: the first caller of a key (the leader) computes, concurrent
+  callers of that key wait and receive a copy of the leader's result
+  (or its exception); threads use `do`, coroutines use `ado`
+- across worker processes (optional, RAG_SINGLE_FLIGHT_LOCK_DIR): the
+  leader also holds an exclusive file lock per key while computing, so
+  the leaders of other processes wait and then find the result in the
+  shared result cache
+
+Only concurrent calls are shared; nothing is kept once the leader is
+done, caching stays with `ResultCache`. The computation passed in must
+therefore check the cache itself for the cross-process variant to help.
+File locks rely on `fcntl` (POSIX); elsewhere only the in-process layer
+applies. They are not reentrant: a computation must not call back into
+the same flight with its own key (it would wait for itself).
+"""
+
+import asyncio
+import copy
+import hashlib
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+
+SINGLE_FLIGHT_LOCK_DIR = os.getenv("RAG_SINGLE_FLIGHT_LOCK_DIR") or None
+LOCK_WAIT_THREADS = int(os.getenv("RAG_SINGLE_FLIGHT_LOCK_THREADS", "16"))
+
+# Async leaders wait for file locks here, not in the default executor
+_lock_executor = None
+_lock_executor_guard = threading.Lock()
+
+
+def lock_executor():
+    global _lock_executor
+    with _lock_executor_guard:
+        if _lock_executor is None:
+            _lock_executor = ThreadPoolExecutor(
+                max_workers=LOCK_WAIT_THREADS, thread_name_prefix="rag-flight-lock"
+            )
+    return _lock_executor
+
+
+class SingleFlight:
+    """
+    Per-key deduplication of concurrent calls.
+
+    `name` prefixes the lock files, so flights sharing `lock_dir` never
+    share a lock. `lock_dir` enables the cross-process file locks; lock
+    files are empty and left in place (removing them would race with
+    waiting processes).
+    """
+
+    def __init__(self, name="flight", lock_dir=SINGLE_FLIGHT_LOCK_DIR):
+        self.name = name
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self._lock = threading.Lock()
+        self._calls = {}
+        # Tasks are bound to the loop that created them
+        self._tasks = weakref.WeakKeyDictionary()
+        self.stats = {"leaders": 0, "followers": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    # -------------------------------
+    # Cross-process file lock
+    # -------------------------------
+    def _acquire(self, key):
+        if self.lock_dir is None:
+            return None
+        os.makedirs(self.lock_dir, exist_ok=True)
+        name = hashlib.md5(key.encode("utf-8")).hexdigest()
+        handle = open(os.path.join(self.lock_dir, f"{self.name}-{name}.lock"), "a")
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    @staticmethod
+    def _release(handle):
+        if handle is not None:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            handle.close()
+
+    # -------------------------------
+    # Threads
+    # -------------------------------
+    def do(self, key, fn, *args, **kwargs):
+        """Return `fn(*args, **kwargs)`, computed once for concurrent callers of `key`."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+            self.stats["leaders" if leader else "followers"] += 1
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return copy.deepcopy(call["result"])
+
+        try:
+            handle = self._acquire(key)
+            try:
+                call["result"] = fn(*args, **kwargs)
+            finally:
+                self._release(handle)
+            return call["result"]
+        except BaseException as error:
+            call["error"] = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+    # -------------------------------
+    # Coroutines
+    # -------------------------------
+    async def ado(self, key, fn, *args, **kwargs):
+        """
+        Async `do`: `await fn(*args, **kwargs)`, computed once per event loop
+        for concurrent callers of `key`.
+
+        The computation runs as its own task, so a cancelled caller does
+        not cancel it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        tasks = self._tasks.setdefault(loop, {})
+        task = tasks.get(key)
+        leader = task is None
+        if leader:
+            task = loop.create_task(self._lead(key, fn, args, kwargs))
+            tasks[key] = task
+            task.add_done_callback(lambda _: tasks.pop(key, None))
+        self._count("leaders" if leader else "followers")
+
+        result = await asyncio.shield(task)
+        return result if leader else copy.deepcopy(result)
+
+    async def _lead(self, key, fn, args, kwargs):
+        handle = None
+        if self.lock_dir is not None:
+            loop = asyncio.get_running_loop()
+            handle = await loop.run_in_executor(lock_executor(), self._acquire, key)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            self._release(handle)
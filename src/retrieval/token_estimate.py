@@ -0,0 +1,14 @@
+"""
+STEP 4 — Token Estimates
+------------------------
+Shared token estimate for budgets (embedding batches, prompt context):
+~4 characters per token, close enough for budgeting without a tokenizer
+dependency. Rounded up, so estimates of parts never undercount the whole.
+"""
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Estimated token count of `text` (at least 1)."""
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
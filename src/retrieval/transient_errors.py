@@ -0,0 +1,24 @@
+"""
+STEP 4 — Transient API Errors
+-----------------------------
+Shared retry policy for OpenAI calls (embedding builds in STEP 4, answer
+generation in STEP 5): only network errors, timeouts, 429 and 5xx are
+worth another attempt; anything else (bad key, invalid input, local bug)
+fails at once.
+"""
+
+
+def is_retryable(error):
+    """Transient failures worth another attempt: network, timeouts, 429 and 5xx."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        import openai
+    except ImportError:  # offline embedding backends
+        return False
+
+    return isinstance(error, (
+        openai.APIConnectionError,  # includes APITimeoutError
+        openai.RateLimitError,
+        openai.InternalServerError,
+    ))
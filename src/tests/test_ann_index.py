@@ -0,0 +1,130 @@
+"""
+STEP 4 — ANN Index Tests
+------------------------
+HNSW and IVF-PQ indexes must stay close to exact search, honour the
+filter ID selector, and be persisted with their spec in the manifest.
+"""
+
+import json
+
+import faiss
+import numpy as np
+import pytest
+
+from src.retrieval import ann_index
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.embedders import HashingEmbedder
+from src.retrieval.embedding_cache import EmbeddingCache
+
+
+def clustered_vectors(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((32, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, 32, n)] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+@pytest.mark.parametrize("spec, min_recall", [
+    (ann_index.HNSW_SPEC, 0.9),
+    # PQ codes are lossy; the benchmark reports the real recall trade-off
+    ({"type": "ivfpq", "pq_m": 16, "nbits": 4, "nprobe": 16}, 0.2),
+])
+def test_ann_recall_and_selector(spec, min_recall):
+    vectors = clustered_vectors(3000, 64)
+    queries = vectors[:50]
+
+    exact, _ = ann_index.build_index(ann_index.FLAT_SPEC, vectors)
+    approx, resolved = ann_index.build_index(spec, vectors)
+    assert resolved["type"] == spec["type"]
+
+    _, truth = exact.search(queries, 10)
+    _, found = approx.search(queries, 10, params=ann_index.search_parameters(resolved))
+    recall = np.mean([len(set(t) & set(f)) / 10 for t, f in zip(truth, found)])
+    assert recall >= min_recall
+
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[1::2] = True
+    bitmap = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+    _, found = approx.search(queries, 10, params=ann_index.search_parameters(resolved, selector))
+    assert all(mask[i] for i in found.ravel() if i >= 0)
+
+
+def test_small_store_falls_back_to_flat():
+    resolved = ann_index.resolve_spec(ann_index.IVFPQ_SPEC, 119, 1536)
+    assert resolved["type"] == "flat"
+    assert resolved["fallback_from"]["type"] == "ivfpq"
+
+
+def test_spec_change_rebuilds_from_stored_vectors(monkeypatch, tmp_path):
+    monkeypatch.setattr(rer, "FAISS_PATH", str(tmp_path / "faiss"))
+    monkeypatch.setattr(rer, "embedding_cache", EmbeddingCache(path=str(tmp_path / "emb.sqlite")))
+    monkeypatch.setattr(rer, "vector_store", rer.VectorStoreManager())
+    monkeypatch.setattr(rer, "_embedder", HashingEmbedder())
+
+    rer.build_or_load_index("cssf")
+    manifest_file = tmp_path / "faiss" / "hashing-ngram-1536" / "cssf_manifest.json"
+    assert json.loads(manifest_file.read_text())["index_spec"] == ann_index.FLAT_SPEC
+
+    calls = []
+    monkeypatch.setattr(rer, "_embed_batch_uncached", lambda texts: calls.append(texts))
+    store = rer.new_store()
+    index = rer.build_or_load_index("cssf", store=store, index_spec=ann_index.HNSW_SPEC)
+
+    assert calls == []
+    assert isinstance(index, faiss.IndexHNSWFlat)
+    assert json.loads(manifest_file.read_text())["index_spec"]["type"] == "hnsw"
+
+
+@pytest.mark.parametrize("storage, max_bytes_per_vector", [("float16", 2 * 64), ("int8", 64)])
+def test_quantized_storage_keeps_neighbours(storage, max_bytes_per_vector):
+    vectors = clustered_vectors(3000, 64)
+    exact, _ = ann_index.build_index(ann_index.FLAT_SPEC, vectors)
+    index, resolved = ann_index.build_index({"type": "flat", "storage": storage}, vectors)
+
+    _, truth = exact.search(vectors[:50], 10)
+    _, found = index.search(vectors[:50], 10)
+    recall = np.mean([len(set(t) & set(f)) / 10 for t, f in zip(truth, found)])
+    assert recall >= 0.9
+    assert index.sa_code_size() <= max_bytes_per_vector
+    assert np.allclose(ann_index.stored_vectors(index), vectors, atol=0.02)
+
+
+def test_ivfpq_fallback_keeps_truncate_dim():
+    resolved = ann_index.resolve_spec({**ann_index.IVFPQ_SPEC, "truncate_dim": 512}, 119, 1536)
+    assert resolved["type"] == "flat" and resolved["truncate_dim"] == 512
+    assert resolved["fallback_from"]["type"] == "ivfpq"
+
+
+def test_only_float32_storage_is_lossless():
+    # fp16-decoded vectors must not seed a rebuild of another index
+    assert ann_index.is_lossless(ann_index.FLAT_SPEC)
+    assert ann_index.is_lossless(ann_index.resolve_spec(ann_index.HNSW_SPEC, 1000, 64))
+    for storage in ("float16", "int8"):
+        assert not ann_index.is_lossless({"type": "flat", "storage": storage})
+
+
+def test_pq_storage_falls_back_to_int8_for_small_stores():
+    resolved = ann_index.resolve_spec({"type": "flat", "storage": "pq"}, 119, 1536)
+    assert resolved["storage"] == "int8"
+    assert resolved["fallback_from"]["storage"] == "pq"
+
+
+def test_truncated_int8_store_persists_single_copy(monkeypatch, tmp_path):
+    monkeypatch.setattr(rer, "FAISS_PATH", str(tmp_path / "faiss"))
+    monkeypatch.setattr(rer, "embedding_cache", EmbeddingCache(path=str(tmp_path / "emb.sqlite")))
+    monkeypatch.setattr(rer, "vector_store", rer.VectorStoreManager())
+    monkeypatch.setattr(rer, "_embedder", HashingEmbedder())
+
+    spec = {"type": "flat", "storage": "int8", "truncate_dim": 512}
+    store = rer.new_store()
+    rer.build_or_load_index("dora", store=store, index_spec=spec)
+
+    store_dir = tmp_path / "faiss" / "hashing-ngram-1536"
+    assert not (store_dir / "dora_vectors.npy").exists()
+    assert store["vectors"].shape == (len(store["ids"]), 512)
+
+    query = HashingEmbedder().embed([store["metadata"][6]["text"]])
+    hits = rer.filtered_search(store, rer.prepare_queries(store, query), 1)[1]
+    assert hits[0][0] == 6
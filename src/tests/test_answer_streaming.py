@@ -0,0 +1,61 @@
+"""
+STEP 5 — Streaming Answer Tests
+-------------------------------
+Streamed answers must yield tokens as they arrive, end with the same
+structured response as the blocking API, and cache the assembled answer.
+"""
+
+import pytest
+
+from src.generation import citation_bound_answer_generation as cbag
+from src.retrieval.result_cache import ResultCache
+
+CONTEXT = {
+    "prompt": "Question: ICT incident reporting?",
+    "retrieved_chunks": [{"chunk_id": "DORA_ART_19", "source_reference": "19", "similarity_score": 0.8}],
+    "answer_confidence": 0.8,
+}
+
+
+@pytest.fixture
+def offline_generation(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_llm_stream(prompt):
+        calls.append(prompt)
+        yield from ["Major ICT incidents ", "must be reported ", "[DORA 19]. "]
+
+    monkeypatch.setattr(cbag, "answer_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(cbag, "answer_cache_key", lambda query_text, top_k=5, multi_retrieval=None: f"{query_text}|{top_k}")
+    monkeypatch.setattr(cbag, "prepare_answer_context", lambda query_text, top_k=5, multi_retrieval=None: CONTEXT)
+    monkeypatch.setattr(cbag, "llm_stream", fake_llm_stream)
+    monkeypatch.setattr(cbag, "llm_call", lambda prompt: "".join(fake_llm_stream(prompt)).strip())
+    return calls
+
+
+def test_stream_yields_tokens_then_response(offline_generation):
+    stream = cbag.stream_citation_bound_answer("ICT incident reporting?")
+    assert stream.response is None
+
+    tokens = list(stream)
+
+    assert tokens == ["Major ICT incidents ", "must be reported ", "[DORA 19]. "]
+    blocking = cbag.generate_citation_bound_answer("ICT incident reporting?")
+    assert stream.response["answer"] == blocking["answer"] == "Major ICT incidents must be reported [DORA 19]."
+    assert stream.response["retrieved_chunks"] == CONTEXT["retrieved_chunks"]
+
+
+def test_cached_stream_stores_assembled_answer(offline_generation):
+    partial = cbag.stream_citation_bound_answer_cached("ICT incident reporting?")
+    next(iter(partial))
+    assert cbag.answer_cache.get(cbag.ANSWER_CACHE_NAMESPACE, "ICT incident reporting?|5") is None
+
+    first = cbag.stream_citation_bound_answer_cached("ICT incident reporting?")
+    list(first)
+    assert len(offline_generation) == 2
+
+    replay = cbag.stream_citation_bound_answer_cached("ICT incident reporting?")
+    assert list(replay) == [first.response["answer"]]
+    assert replay.response == first.response
+    assert cbag.generate_citation_bound_answer_cached("ICT incident reporting?") == first.response
+    assert len(offline_generation) == 2
@@ -0,0 +1,38 @@
+"""
+STEP 4 — Chunk Registry Tests
+-----------------------------
+Chunks must be reachable by chunk_id and row id without scanning
+the metadata list, and hits hydrated with their text in one call.
+"""
+
+from src.retrieval import run_embeddings_retrieval as rer
+
+
+def test_lookup_by_chunk_id_and_row():
+    store = rer.vector_store["dora"]
+    registry = store["registry"]
+
+    assert len(registry) == len(store["metadata"])
+    for row in (0, 7, len(registry) - 1):
+        chunk_id = store["ids"][row]
+        assert registry.row(chunk_id) == row
+        assert registry.get(chunk_id) == store["metadata"][row]
+
+    rows = registry.rows([store["ids"][3], "missing", store["ids"][1]])
+    assert rows.tolist() == [3, -1, 1]
+    assert registry.get("missing") is None
+
+
+def test_hydrate_keeps_hit_order_and_scores():
+    store = rer.vector_store["eba"]
+    hits = rer.search_store("eba", store["vectors"][:1], top_k=5, threshold=0.0)[0]
+    hits.insert(1, {"chunk_id": "unknown", "similarity_score": 1.0})
+
+    hydrated = store["registry"].hydrate(hits, fields=("text", "paragraph_number"))
+
+    assert [h["chunk_id"] for h in hydrated] == [h["chunk_id"] for h in hits if h["chunk_id"] != "unknown"]
+    for h in hydrated:
+        chunk = store["registry"].get(h["chunk_id"])
+        assert h["text"] == chunk["text"]
+        assert "authority" not in h
+    assert hydrated[0]["similarity_score"] == hits[0]["similarity_score"]
@@ -0,0 +1,62 @@
+"""
+STEP 5 — Context Packing Tests
+------------------------------
+The citation prompt must stay within its token budget: chunks packed by
+score, overlong ones trimmed to query-matching passages, and every trim
+or drop reported.
+"""
+
+from src.generation import citation_bound_answer_generation as cbag
+from src.generation.context_packing import pack_context, trim_to_passages
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.token_estimate import estimate_tokens
+from src.retrieval.result_cache import ResultCache
+
+FILLER = "Financial entities shall maintain documentation of their governance arrangements. " * 6
+
+
+def test_trim_keeps_heading_and_matching_passages():
+    text = "Article 19 Reporting of major ICT-related incidents. " + FILLER + \
+        "Major ICT-related incidents shall be reported to the competent authority. " + FILLER
+
+    trimmed = trim_to_passages(text, "reporting major incidents to the competent authority", max_tokens=40)
+
+    assert trimmed.startswith("Article 19 Reporting")
+    assert "reported to the competent authority" in trimmed
+    assert estimate_tokens(trimmed) <= 40
+
+
+def test_pack_by_score_within_budget():
+    chunks = [
+        {"chunk_id": "low", "text": "Low scoring chunk about outsourcing. " * 20, "similarity_score": 0.6},
+        {"chunk_id": "long", "text": "Article 6 ICT risk. " + FILLER * 4 + "ICT risk framework review. " + FILLER,
+         "similarity_score": 0.9},
+        {"chunk_id": "short", "text": "ICT risk management framework shall be documented.", "similarity_score": 0.8},
+    ]
+
+    packed, report = pack_context(chunks, "ICT risk framework", budget=250, max_chunk_tokens=120)
+
+    assert [c["chunk_id"] for c in packed] == ["long", "short"]
+    assert report["trimmed"] == ["long"]
+    assert report["dropped"] == [{"chunk_id": "low", "reason": "no_matching_passage"}]
+    assert report["tokens_used"] == sum(estimate_tokens(c["text"]) for c in packed) <= 250
+
+
+def test_answer_context_reports_dropped_chunks(monkeypatch, tmp_path):
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(cbag, "pack_context", lambda chunks, query_text: pack_context(chunks, query_text, budget=300))
+    multi = rer.retrieve_multi(
+        "ICT risk", cbag.regulator_filters(), top_k=5,
+        query_vector=rer.vector_store["dora"]["vectors"][5], threshold=0.0
+    )
+
+    context = cbag.build_answer_context("ICT risk", multi)
+
+    cited = {c["chunk_id"] for c in context["retrieved_chunks"]}
+    drops = context["context_packing"]["dropped"]
+    packing_drops = {d["chunk_id"] for d in drops if d["reason"] != "near_duplicate"}
+    assert packing_drops and not cited & packing_drops
+    assert len(cited) + len(packing_drops) == len(multi["fused_chunks"])
+    retrieved = sum(len(r["retrieved_chunks"]) for r in multi["results_by_store"].values())
+    assert len(cited) + len(drops) == retrieved
+    assert context["context_packing"]["tokens_used"] <= 300
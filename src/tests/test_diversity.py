@@ -0,0 +1,46 @@
+"""
+STEP 4 — Result Diversification Tests
+-------------------------------------
+MMR must drop near-duplicate chunks, prefer novel ones as `diversity`
+grows, and leave retrieval unchanged when no diversity is requested.
+"""
+
+import numpy as np
+import pytest
+
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.diversity import mmr_select
+
+
+def unit(v):
+    v = np.asarray(v, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_near_duplicates_are_dropped_and_novel_hits_promoted():
+    vectors = np.vstack([
+        unit([1.0, 0.0, 0.0]),
+        unit([1.0, 0.05, 0.0]),  # near-duplicate of the first hit
+        unit([0.8, 0.6, 0.0]),
+        unit([0.6, 0.0, 0.8]),
+    ])
+    relevance = np.array([0.9, 0.89, 0.8, 0.75])
+
+    assert mmr_select(vectors, relevance, diversity=0.0).tolist() == [0, 2, 3]
+    assert mmr_select(vectors, relevance, diversity=0.7).tolist() == [0, 3, 2]
+
+    with pytest.raises(ValueError):
+        mmr_select(vectors, relevance, diversity=1.5)
+
+
+def test_search_store_diversity_is_opt_in():
+    store = rer.vector_store["eba"]
+    queries = store["vectors"][:4]
+
+    plain = rer.search_store("eba", queries, top_k=5, threshold=0.0)
+    diverse = rer.search_store("eba", queries, top_k=5, threshold=0.0, diversity=0.5)
+
+    for hits, diverse_hits in zip(plain, diverse):
+        assert diverse_hits[0]["chunk_id"] == hits[0]["chunk_id"]
+        assert {h["chunk_id"] for h in diverse_hits} <= {h["chunk_id"] for h in hits}
+    assert rer.retrieval_cache_key("q", "eba", diversity=0.5) != rer.retrieval_cache_key("q", "eba")
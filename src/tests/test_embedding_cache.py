@@ -0,0 +1,66 @@
+"""
+STEP 4 — Embedding Cache Tests
+------------------------------
+Repeated query texts must be served from the LRU or the on-disk
+store instead of calling the embeddings API again.
+"""
+
+import numpy as np
+import pytest
+
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def api_calls(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_embed(text_list):
+        calls.append(list(text_list))
+        return np.array([[float(len(t)), 1.0, 0.0] for t in text_list], dtype=np.float32)
+
+    monkeypatch.setattr(rer, "_embed_batch_uncached", fake_embed)
+    monkeypatch.setattr(rer, "embedding_cache", EmbeddingCache(path=str(tmp_path / "emb.sqlite")))
+    return calls
+
+
+def test_repeated_text_hits_memory(api_calls):
+    first = rer.embed_text("ICT risk  management")
+    second = rer.embed_text(" ICT risk management ")
+
+    assert np.array_equal(first, second)
+    assert len(api_calls) == 1
+    stats = rer.embedding_cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_batch_only_embeds_misses(api_calls):
+    rer.embed_text("register of information")
+    vectors = rer.embed_batch(["register of information", "ICT third-party", "ICT third-party"])
+
+    assert vectors.shape == (3, 3)
+    assert api_calls == [["register of information"], ["ICT third-party"]]
+
+
+def test_disk_tier_survives_new_process(api_calls, monkeypatch):
+    rer.embed_text("Article 28")
+    path = rer.embedding_cache.path
+    rer.embedding_cache.close()
+
+    fresh = EmbeddingCache(path=path)
+    monkeypatch.setattr(rer, "embedding_cache", fresh)
+    rer.embed_text("Article 28")
+
+    assert len(api_calls) == 1
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_lru_eviction(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "emb.sqlite"), max_memory_items=2)
+    cache.put_many("m", ["a", "b", "c"], np.eye(3, dtype=np.float32))
+
+    assert cache.stats()["memory_items"] == 2
+    assert cache.get_many("m", ["a"])[0] is not None
+    assert cache.stats()["disk_hits"] == 1
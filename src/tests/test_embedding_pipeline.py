@@ -0,0 +1,89 @@
+"""
+STEP 4 — Embedding Pipeline Tests
+---------------------------------
+Index-build embeddings run concurrently in token-bounded batches,
+survive transient API errors and resume from the embedding cache
+after an aborted build.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.embedding_cache import EmbeddingCache
+from src.retrieval.embedding_pipeline import EmbeddingPipeline, pack_batches
+
+
+def fake_vectors(texts):
+    return np.array([[float(len(t)), float(t.count("a")), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_pack_batches_respects_item_and_token_limits():
+    texts = ["x" * 400] * 10 + ["y" * 4000]
+    batches = pack_batches(texts, max_items=4, max_tokens=300)
+
+    assert [p for positions, _ in batches for p in positions] == list(range(len(texts)))
+    assert all(len(positions) <= 4 for positions, _ in batches)
+    assert all(tokens <= 300 for positions, tokens in batches if len(positions) > 1)
+    assert batches[-1] == ([10], 1000)
+
+
+def test_concurrent_run_keeps_order_and_retries():
+    failures = {"left": 2}
+    lock = threading.Lock()
+
+    def flaky_embed(texts):
+        with lock:
+            if failures["left"]:
+                failures["left"] -= 1
+                raise ConnectionError("transient")
+        return fake_vectors(texts)
+
+    texts = [f"text {i} " + "a" * (i % 7) for i in range(200)]
+    pipeline = EmbeddingPipeline(flaky_embed, concurrency=4, max_batch_items=16, sleep=lambda s: None)
+    vectors = pipeline.run(texts)
+
+    assert np.array_equal(vectors, fake_vectors(texts))
+    assert pipeline.stats["retries"] == 2
+    assert pipeline.stats["texts"] == 200
+
+
+def test_non_retryable_error_fails_on_first_attempt():
+    calls = []
+    sleeps = []
+
+    def rejected_embed(texts):
+        calls.append(texts)
+        raise ValueError("input too long")
+
+    pipeline = EmbeddingPipeline(rejected_embed, concurrency=1, sleep=sleeps.append)
+    with pytest.raises(ValueError):
+        pipeline.run(["Article 28 register of information"])
+
+    assert len(calls) == 1
+    assert sleeps == [] and pipeline.stats["retries"] == 0
+
+
+def test_aborted_build_resumes_from_checkpoint(monkeypatch, tmp_path):
+    monkeypatch.setattr(rer, "embedding_cache", EmbeddingCache(path=str(tmp_path / "emb.sqlite")))
+    texts = [f"chunk {i}" for i in range(40)]
+    calls = []
+
+    def failing_embed(batch):
+        calls.extend(batch)
+        if "chunk 25" in batch:
+            raise RuntimeError("API down")
+        return fake_vectors(batch)
+
+    pipeline = EmbeddingPipeline(failing_embed, concurrency=1, max_batch_items=10, max_retries=0)
+    with pytest.raises(RuntimeError):
+        rer.embed_many(texts, pipeline=pipeline)
+
+    calls.clear()
+    resumed = EmbeddingPipeline(lambda batch: calls.extend(batch) or fake_vectors(batch), max_batch_items=10)
+    vectors = rer.embed_many(texts, pipeline=resumed)
+
+    assert np.array_equal(vectors, fake_vectors(texts))
+    assert calls == texts[20:]
@@ -0,0 +1,55 @@
+"""
+STEP 4 — Hybrid Retrieval Tests
+-------------------------------
+BM25 must surface exact regulatory terms, and hybrid retrieval must
+keep lexical matches that dense similarity alone would cut off.
+"""
+
+import numpy as np
+
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.lexical_index import BM25Index, save_bm25_index
+
+
+def test_bm25_ranks_exact_phrase_first():
+    chunks = rer.vector_store["dora"]["metadata"]
+    bm25 = BM25Index.from_chunks(chunks)
+
+    scores = bm25.score("register of information")
+    top = [chunks[i]["chunk_id"] for i in np.argsort(-scores)[:3]]
+    assert "dora_article_28" in top
+    assert scores.dtype == np.float32
+
+
+def test_bm25_roundtrip(tmp_path):
+    chunks = rer.vector_store["cssf"]["metadata"]
+    path = tmp_path / "cssf_bm25.npz"
+    save_bm25_index(chunks, path)
+
+    loaded = BM25Index.load(path)
+    assert loaded.chunk_ids == [c["chunk_id"] for c in chunks]
+    assert np.allclose(loaded.score("ICT risk"), BM25Index.from_chunks(chunks).score("ICT risk"))
+
+
+def test_hybrid_keeps_lexical_match_below_dense_threshold(monkeypatch):
+    store = rer.vector_store["dora"]
+    # Orthogonal query vector: every cosine is ~0, so dense-only retrieval finds nothing
+    query_vector = np.zeros(store["index"].d, dtype=np.float32)
+    query_vector[0] = 1.0
+
+    assert rer.search_store("dora", query_vector, top_k=5)[0] == []
+
+    result = rer.retrieve_hybrid(
+        "register of information",
+        "dora",
+        authority="European Union",
+        jurisdiction="EU",
+        top_k=5,
+        query_vector=query_vector,
+    )
+    chunks = result["retrieved_chunks"]
+    assert chunks
+    assert chunks[0]["bm25_score"] == 1.0
+    assert all(c["bm25_score"] >= rer.LEXICAL_MIN_SCORE for c in chunks)
+    hybrid = [c["hybrid_score"] for c in chunks]
+    assert hybrid == sorted(hybrid, reverse=True)
@@ -0,0 +1,82 @@
+"""
+STEP 4 — Incremental Index Build Tests
+--------------------------------------
+Rebuilding a store after re-chunking must reuse the vectors of
+unchanged chunks and only embed new or edited ones; metadata-only
+changes must still be persisted.
+"""
+
+import numpy as np
+import pytest
+
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.embedders import HashingEmbedder
+from src.retrieval.embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def embedded_texts(monkeypatch, tmp_path):
+    embedder = HashingEmbedder(dim=64)
+    calls = []
+
+    def counting_embed(texts):
+        calls.extend(texts)
+        return embedder.embed(texts)
+
+    monkeypatch.setattr(rer, "FAISS_PATH", str(tmp_path / "faiss"))
+    monkeypatch.setattr(rer, "embedding_cache", EmbeddingCache(path=str(tmp_path / "emb.sqlite")))
+    monkeypatch.setattr(rer, "vector_store", rer.VectorStoreManager())
+    monkeypatch.setattr(rer, "_embedder", embedder)
+    monkeypatch.setattr(rer, "_embed_batch_uncached", counting_embed)
+    return calls
+
+
+def test_update_embeds_only_delta(embedded_texts):
+    chunks = [dict(c) for c in rer.load_chunks(rer.CHUNK_FILES["dora"])[:20]]
+    first = rer.update_index("dora", chunks)
+    assert (first["embedded"], first["reused"]) == (20, 0)
+
+    embedded_texts.clear()
+
+    edited = [dict(c) for c in chunks[:18]]
+    edited[5]["text"] += " (amended)"
+    edited.append({**chunks[0], "chunk_id": "dora_new", "text": "New ICT incident classification rules."})
+
+    report = rer.update_index("dora", edited)
+    assert (report["reused"], report["embedded"], report["removed"]) == (17, 2, 3)
+    assert sorted(embedded_texts) == sorted([edited[5]["text"], edited[-1]["text"]])
+
+    store = rer.vector_store["dora"]
+    assert store["ids"] == [c["chunk_id"] for c in edited]
+    assert store["index"].ntotal == len(edited)
+    expected = HashingEmbedder(dim=64).embed([c["text"] for c in edited])
+    assert np.allclose(store["vectors"], expected, atol=1e-5)
+
+
+def test_unchanged_chunks_skip_rebuild(embedded_texts):
+    chunks = rer.load_chunks(rer.CHUNK_FILES["eba"])[:10]
+    rer.update_index("eba", chunks)
+    embedded_texts.clear()
+
+    report = rer.update_index("eba", chunks)
+    assert report["unchanged"]
+    assert report["reused"] == 10
+    assert embedded_texts == []
+
+
+def test_metadata_only_change_is_persisted(embedded_texts):
+    chunks = [dict(c) for c in rer.load_chunks(rer.CHUNK_FILES["eba"])[:10]]
+    rer.update_index("eba", chunks)
+    fingerprint = rer.vector_store.fingerprint("eba")
+    embedded_texts.clear()
+
+    retagged = [dict(c) for c in chunks]
+    retagged[3]["binding_level"] = "guidance"
+    report = rer.update_index("eba", retagged)
+
+    assert not report["unchanged"]
+    assert (report["reused"], report["embedded"]) == (10, 0)
+    assert embedded_texts == []
+    store = rer.vector_store["eba"]
+    assert store["metadata"][3]["binding_level"] == "guidance"
+    assert rer.vector_store.fingerprint("eba") != fingerprint
@@ -0,0 +1,124 @@
+"""
+STEP 5 — Pooled LLM Client Tests
+--------------------------------
+The client must bound concurrent requests, retry transient errors,
+fail fast on permanent ones and respect the per-request deadline.
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from src.generation.llm_client import LLMClient
+
+MESSAGES = [{"role": "user", "content": "ICT incident reporting?"}]
+
+
+def completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f" {text} "))])
+
+
+def fake_async_client(create):
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def connection_error():
+    return openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    in_flight, peak = 0, 0
+
+    async def create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return completion("ok")
+
+    client = LLMClient(concurrency=2, async_client=fake_async_client(create))
+    answers = await asyncio.gather(*(client.complete(MESSAGES) for _ in range(6)))
+
+    assert answers == ["ok"] * 6
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_permanent_ones_raised():
+    attempts = []
+
+    async def flaky(**kwargs):
+        attempts.append(kwargs)
+        if len(attempts) < 3:
+            raise connection_error()
+        return completion("recovered")
+
+    client = LLMClient(async_client=fake_async_client(flaky), backoff_base=0.001)
+    assert await client.complete(MESSAGES) == "recovered"
+    assert client.stats["retries"] == 2
+
+    async def invalid(**kwargs):
+        raise ValueError("bad request")
+
+    client = LLMClient(async_client=fake_async_client(invalid), backoff_base=0.001)
+    with pytest.raises(ValueError):
+        await client.complete(MESSAGES)
+    assert client.stats["retries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_spans_retries():
+    async def slow(**kwargs):
+        await asyncio.sleep(1)
+        return completion("too late")
+
+    client = LLMClient(async_client=fake_async_client(slow), timeout=0.05, backoff_base=0.001)
+    with pytest.raises(TimeoutError):
+        await client.complete(MESSAGES)
+    assert client.stats["timeouts"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_sync_and_async_callers_share_one_limit():
+    in_flight, peak = 0, 0
+    lock = threading.Lock()
+
+    def enter():
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+
+    def leave():
+        nonlocal in_flight
+        with lock:
+            in_flight -= 1
+
+    async def acreate(**kwargs):
+        enter()
+        await asyncio.sleep(0.05)
+        leave()
+        return completion("async")
+
+    def create(**kwargs):
+        enter()
+        threading.Event().wait(0.05)
+        leave()
+        return completion("sync")
+
+    sync_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    client = LLMClient(concurrency=2, client=sync_client, async_client=fake_async_client(acreate))
+
+    answers = await asyncio.gather(
+        *(asyncio.to_thread(client.complete_sync, MESSAGES) for _ in range(3)),
+        *(client.complete(MESSAGES) for _ in range(3)),
+    )
+
+    assert sorted(answers) == ["async"] * 3 + ["sync"] * 3
+    assert peak == 2
@@ -0,0 +1,52 @@
+"""
+STEP 4 — Columnar Metadata Tests
+--------------------------------
+The columnar layout must round-trip the chunk dicts, keep texts out of
+memory until a row is read, and give the same filter masks as before.
+"""
+
+import numpy as np
+
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.metadata_store import (
+    ColumnarMetadata, encode_columns, write_columns, write_text_blob,
+)
+
+CHUNKS = [
+    {"chunk_id": "a", "text": "Article 1 — scope", "authority": "EBA", "binding_level": "binding"},
+    {"chunk_id": "b", "text": "Ünïcode text", "authority": "EBA"},
+    {"chunk_id": "c", "text": "", "authority": "CSSF", "binding_level": "guidance", "pages": [1, 2]},
+]
+
+
+def write_store(tmp_path, chunks):
+    columns, blob = encode_columns(chunks)
+    write_columns(columns, str(tmp_path / "store_meta.npz"))
+    write_text_blob(blob, str(tmp_path / "store_text.bin"))
+    return ColumnarMetadata.load(str(tmp_path / "store"))
+
+
+def test_round_trip(tmp_path):
+    metadata = write_store(tmp_path, CHUNKS)
+
+    assert len(metadata) == 3
+    assert list(metadata) == CHUNKS
+    assert metadata[-1] == CHUNKS[2]
+    assert metadata[1:] == CHUNKS[1:]
+    assert metadata.chunk_ids == ["a", "b", "c"]
+    assert isinstance(metadata._blob, np.memmap)
+    # Repeated values are stored once per store
+    assert metadata.categories["authority"] == ["EBA", "CSSF"]
+
+
+def test_filter_masks_match_row_scan(tmp_path):
+    metadata = write_store(tmp_path, CHUNKS)
+
+    columnar = rer.build_filter_masks(metadata)
+    scanned = rer.build_filter_masks(CHUNKS)
+
+    for field in rer.FILTER_FIELDS:
+        assert np.array_equal(columnar[field]["present"], scanned[field]["present"])
+        assert columnar[field]["values"].keys() == scanned[field]["values"].keys()
+        for value, mask in scanned[field]["values"].items():
+            assert np.array_equal(columnar[field]["values"][value], mask)
@@ -0,0 +1,116 @@
+"""
+STEP 4 — Offline Embedding Backend Tests
+----------------------------------------
+Index building and retrieval must run end to end without network
+access, using the deterministic hashing backend, and recorded
+vectors must replay identically.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.embedders import HashingEmbedder, RecordingEmbedder
+from src.retrieval.embedding_cache import EmbeddingCache
+from src.retrieval.result_cache import ResultCache
+
+
+@pytest.fixture
+def offline_retrieval(monkeypatch, tmp_path):
+    monkeypatch.setattr(rer, "FAISS_PATH", str(tmp_path / "faiss"))
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(rer, "embedding_cache", EmbeddingCache(path=str(tmp_path / "emb.sqlite")))
+    monkeypatch.setattr(rer, "vector_store", rer.VectorStoreManager())
+    monkeypatch.setattr(rer, "_embedder", None)
+    rer.set_embedder(HashingEmbedder())
+    return rer
+
+
+def test_hashing_embedder_is_deterministic():
+    a = HashingEmbedder().embed(["Article 28 register of information"])
+    b = HashingEmbedder().embed(["Article 28 register of information"])
+
+    assert a.shape == (1, rer.VECTOR_DIM)
+    assert np.array_equal(a, b)
+    assert np.linalg.norm(a[0]) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_offline_build_and_retrieve(offline_retrieval, tmp_path):
+    store = offline_retrieval.vector_store["dora"]
+    assert store["index"].ntotal == len(store["metadata"])
+    assert (tmp_path / "faiss" / "hashing-ngram-1536" / "dora.index").exists()
+
+    target = store["metadata"][6]
+    result = offline_retrieval.retrieve(
+        query_text=target["text"][:400],
+        vector_store_key="dora",
+        authority="European Union",
+        jurisdiction="EU",
+        top_k=3,
+    )
+    assert result["retrieved_chunks"][0]["chunk_id"] == target["chunk_id"]
+
+
+def test_recording_then_replay(tmp_path):
+    path = str(tmp_path / "recording.jsonl")
+    recorder = RecordingEmbedder(path, inner=HashingEmbedder(dim=64), mode="record")
+    recorded = recorder.embed(["ICT third-party risk", "register of information"])
+
+    replay = RecordingEmbedder(path, mode="replay")
+    assert replay.model_name == "hashing-ngram-64"
+    assert np.array_equal(replay.embed(["register of information"]), recorded[1:])
+
+    with pytest.raises(KeyError):
+        replay.embed(["never recorded"])
+
+
+class AsyncHashingEmbedder(HashingEmbedder):
+    """Hashing backend with a native async path, counting its calls."""
+
+    def __init__(self):
+        super().__init__()
+        self.async_calls = []
+
+    async def aembed(self, texts):
+        self.async_calls.append(list(texts))
+        return self.embed(texts)
+
+
+@pytest.mark.asyncio
+async def test_aretrieve_multi_matches_sync(offline_retrieval, monkeypatch, tmp_path):
+    embedder = AsyncHashingEmbedder()
+    offline_retrieval.set_embedder(embedder)
+    query = "Which requirements apply? " + offline_retrieval.vector_store["eba"]["metadata"][10]["text"][:300]
+
+    result = await offline_retrieval.aretrieve_multi(query, ["cssf", "dora", "eba"], top_k=3, unified=False)
+    assert embedder.async_calls == [[query]]
+
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "fresh.sqlite")))
+    expected = offline_retrieval.retrieve_multi(query, ["cssf", "dora", "eba"], top_k=3, unified=False)
+    for store_key in ("cssf", "dora", "eba"):
+        assert [c["chunk_id"] for c in result["results_by_store"][store_key]["retrieved_chunks"]] == \
+            [c["chunk_id"] for c in expected["results_by_store"][store_key]["retrieved_chunks"]]
+
+    # Cached: neither the embedder nor the async client is called again
+    await offline_retrieval.aretrieve(query, "eba", top_k=3)
+    assert len(embedder.async_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_cache_keys_stay_off_the_event_loop(offline_retrieval, monkeypatch):
+    # Cache keys need store fingerprints, which may load (or build) the store
+    threads = []
+    cache_key = rer.retrieval_cache_key
+
+    def recording_cache_key(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return cache_key(*args, **kwargs)
+
+    monkeypatch.setattr(rer, "retrieval_cache_key", recording_cache_key)
+    offline_retrieval.set_embedder(AsyncHashingEmbedder())
+
+    await offline_retrieval.aretrieve_multi("ICT third-party risk", ["cssf", "dora", "eba"], top_k=3, unified=False)
+
+    assert threads and all(name.startswith("rag-search") for name in threads)
@@ -0,0 +1,113 @@
+"""
+STEP 4 — Result Cache Tests
+---------------------------
+The shared result cache must serve repeated retrievals without
+searching again, expire entries by TTL and stay within its byte budget.
+"""
+
+import time
+
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.result_cache import ResultCache
+
+
+def test_retrieve_served_from_cache(monkeypatch, tmp_path):
+    store = rer.vector_store["dora"]
+    searches = []
+    original_search = rer.search_store
+
+    def counting_search(*args, **kwargs):
+        searches.append(args[0])
+        return original_search(*args, **kwargs)
+
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(rer, "embed_text", lambda text: store["vectors"][3].copy())
+    monkeypatch.setattr(rer, "search_store", counting_search)
+
+    first = rer.retrieve("register of information", "dora", top_k=3)
+    second = rer.retrieve("register of information", "dora", top_k=3)
+
+    assert first == second
+    assert searches == ["dora"]
+    assert rer.result_cache.stats()["namespaces"]["retrieval"]["hits"] == 1
+
+
+def test_ttl_expiry(tmp_path):
+    cache = ResultCache(path=str(tmp_path / "results.sqlite"), ttl_seconds=1)
+    cache.set("answers", "q", {"answer": "cached"})
+    assert cache.get("answers", "q") == {"answer": "cached"}
+
+    cache.set("answers", "q", {"answer": "stale"}, ttl_seconds=-1)
+    assert cache.get("answers", "q") is None
+    assert cache.stats()["namespaces"]["answers"]["entries"] == 0
+
+
+def test_lru_eviction_within_budget(tmp_path):
+    value = {"text": "x" * 100}
+    cache = ResultCache(path=str(tmp_path / "results.sqlite"), max_bytes=350, ttl_seconds=0, touch_seconds=0)
+    for key in ("a", "b", "c"):
+        cache.set("retrieval", key, value)
+        time.sleep(0.01)
+
+    cache.get("retrieval", "a")
+    cache.set("retrieval", "d", value)
+
+    assert cache.contains("retrieval", "a")
+    assert not cache.contains("retrieval", "b")
+    assert cache.stats()["total_bytes"] <= 350
+
+    assert cache.prune(max_bytes=0) == 3
+    assert cache.stats()["total_bytes"] == 0
+
+
+def test_recent_hits_do_not_write(tmp_path):
+    cache = ResultCache(path=str(tmp_path / "results.sqlite"), touch_seconds=60)
+    cache.set("answers", "q", {"answer": "cached"})
+    accessed_at = lambda: cache._connection().execute("SELECT accessed_at FROM entries").fetchone()[0]
+    written = accessed_at()
+
+    assert cache.get("answers", "q") == {"answer": "cached"}
+    assert accessed_at() == written
+
+    cache.touch_seconds = 0
+    cache.get("answers", "q")
+    assert accessed_at() > written
+
+
+def test_reindexed_store_only_invalidates_its_entries(monkeypatch, tmp_path):
+    searches = []
+    original_search = rer.search_store
+
+    def counting_search(*args, **kwargs):
+        searches.append(args[0])
+        return original_search(*args, **kwargs)
+
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(rer, "embed_text", lambda text: rer.vector_store["eba"]["vectors"][0].copy())
+    monkeypatch.setattr(rer, "search_store", counting_search)
+
+    for store_key in ("dora", "eba"):
+        rer.retrieve("outsourcing arrangements", store_key, top_k=3)
+
+    monkeypatch.setitem(rer.vector_store["dora"], "fingerprint", "re-chunked")
+    for store_key in ("dora", "eba"):
+        rer.retrieve("outsourcing arrangements", store_key, top_k=3)
+
+    assert searches == ["dora", "eba", "dora"]
+
+
+def test_fingerprint_tracks_content():
+    metadata = [{"chunk_id": "a", "text": "ICT risk"}, {"chunk_id": "b", "text": "outsourcing"}]
+    changed = [metadata[0], {"chunk_id": "b", "text": "outsourcing (amended)"}]
+
+    assert rer.store_fingerprint(metadata, "m") == rer.store_fingerprint(list(metadata), "m")
+    assert rer.store_fingerprint(metadata, "m") != rer.store_fingerprint(changed, "m")
+    assert rer.store_fingerprint(metadata, "m") != rer.store_fingerprint(metadata, "other-model")
+
+
+def test_fingerprint_tracks_index_spec(monkeypatch):
+    before = rer.vector_store.fingerprint("dora")
+    monkeypatch.setitem(rer.vector_store["dora"], "index_spec", {"type": "flat", "storage": "int8"})
+
+    assert rer.vector_store.fingerprint("dora") != before
+    assert rer.search_fingerprint("abc", {"type": "flat"}) != rer.search_fingerprint("abc", {"type": "hnsw"})
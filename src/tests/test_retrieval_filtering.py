@@ -0,0 +1,178 @@
+"""
+STEP 4 — Filter Pushdown Tests
+------------------------------
+Validates that the precomputed row masks reproduce `hard_filter`
+and that filtered search over the persistent index only returns
+rows allowed by the filter.
+
+Embeddings are patched with stored chunk vectors to avoid API calls.
+"""
+
+import pytest
+
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.result_cache import ResultCache
+
+
+FILTER_CASES = [
+    {},
+    {"authority": "CSSF", "jurisdiction": "LU"},
+    {"authority": "European Union", "jurisdiction": "EU"},
+    {"authority": "European Banking Authority", "jurisdiction": "EU"},
+    {"binding_level": "EU Regulation"},
+    {"authority": "Unknown Authority"},
+]
+
+
+@pytest.mark.parametrize("store_key", ["cssf", "dora", "eba"])
+@pytest.mark.parametrize("filters", FILTER_CASES)
+def test_filter_mask_matches_hard_filter(store_key, filters):
+    metadata = rer.vector_store[store_key]["metadata"]
+    expected = {c["chunk_id"] for c in rer.hard_filter(metadata, **filters)}
+
+    mask = rer.filter_mask(store_key, **filters)
+    if mask is None:
+        selected = {c["chunk_id"] for c in metadata}
+    else:
+        selected = {metadata[i]["chunk_id"] for i in mask.nonzero()[0]}
+
+    assert selected == expected
+
+
+@pytest.mark.parametrize("store_key", ["dora", "eba"])
+def test_filtered_search_respects_mask(store_key, monkeypatch, tmp_path):
+    store = rer.vector_store[store_key]
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(rer, "embed_text", lambda text: store["vectors"][0].copy())
+
+    result = rer.retrieve(
+        query_text="filter pushdown",
+        vector_store_key=store_key,
+        authority=store["metadata"][0]["authority"],
+        binding_level="not-a-binding-level",
+        top_k=5,
+    )
+    assert result["retrieved_chunks"] == []
+
+    result = rer.retrieve(
+        query_text="filter pushdown",
+        vector_store_key=store_key,
+        authority=store["metadata"][0]["authority"],
+        jurisdiction=store["metadata"][0]["jurisdiction"],
+        top_k=5,
+    )
+    chunks = result["retrieved_chunks"]
+    assert chunks[0]["chunk_id"] == store["ids"][0]
+    assert chunks[0]["similarity_score"] == pytest.approx(1.0, abs=1e-5)
+    scores = [c["similarity_score"] for c in chunks]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_retrieve_multi_embeds_once(monkeypatch, tmp_path):
+    calls = []
+    query = rer.vector_store["dora"]["vectors"][3].copy()
+
+    def fake_embed_text(text):
+        calls.append(text)
+        return query
+
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(rer, "embed_text", fake_embed_text)
+
+    result = rer.retrieve_multi(
+        query_text="shared embedding",
+        store_filters={
+            "cssf": {"authority": "CSSF", "jurisdiction": "LU"},
+            "dora": {"authority": "European Union", "jurisdiction": "EU"},
+            "eba": {"authority": "European Banking Authority", "jurisdiction": "EU"},
+        },
+        top_k=3,
+    )
+
+    assert calls == ["shared embedding"]
+    assert set(result["results_by_store"]) == {"cssf", "dora", "eba"}
+    fused = result["fused_chunks"]
+    assert fused[0]["chunk_id"] == rer.vector_store["dora"]["ids"][3]
+    assert fused[0]["vector_store_key"] == "dora"
+    scores = [c["similarity_score"] for c in fused]
+    assert scores == sorted(scores, reverse=True)
+
+    # Fully cached request: no embedding call at all
+    rer.retrieve_multi(
+        "shared embedding",
+        {"dora": {"authority": "European Union", "jurisdiction": "EU"}},
+        top_k=3,
+    )
+    assert len(calls) == 1
+
+
+def test_retrieve_many_matches_single_retrieval(monkeypatch, tmp_path):
+    vectors = rer.vector_store["eba"]["vectors"]
+    lookup = {f"query {i}": vectors[i].copy() for i in range(0, 60, 7)}
+
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(rer, "BATCH_SIZE", 3)
+    monkeypatch.setattr(rer, "embed_text", lambda text: lookup[text])
+    monkeypatch.setattr(rer, "embed_batch", lambda texts: rer.np.vstack([lookup[t] for t in texts]))
+
+    filters = {
+        "eba": {"authority": "European Banking Authority", "jurisdiction": "EU"},
+        "dora": {"authority": "European Union", "jurisdiction": "EU"},
+    }
+    queries = list(lookup)
+    outputs = rer.retrieve_many(queries, ["eba", "dora"], filters=filters, top_k=4)
+
+    assert [o["query"] for o in outputs] == queries
+    for query, output in zip(queries, outputs):
+        for store_key in ("eba", "dora"):
+            single = rer.retrieve(query, store_key, top_k=4, **filters[store_key])
+            assert output["results_by_store"][store_key]["retrieved_chunks"] == single["retrieved_chunks"]
+
+
+def test_unified_index_matches_per_store_search(monkeypatch, tmp_path):
+    lookup = {
+        "cssf query": rer.vector_store["cssf"]["vectors"][2].copy(),
+        "eba query": rer.vector_store["eba"]["vectors"][40].copy(),
+    }
+    monkeypatch.setattr(rer, "embed_text", lambda text: lookup[text])
+
+    store_filters = {
+        "cssf": {"authority": "CSSF", "jurisdiction": "LU"},
+        "dora": {"authority": "European Union", "jurisdiction": "EU"},
+        "eba": {"authority": "European Banking Authority", "jurisdiction": "EU", "binding_level": "Guideline (Comply or Explain)"},
+    }
+    for query in lookup:
+        monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "per_store.sqlite")))
+        expected = rer.retrieve_multi(query, store_filters, top_k=4, unified=False)
+        monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "unified.sqlite")))
+        actual = rer.retrieve_multi(query, store_filters, top_k=4, unified=True)
+
+        for store_key in store_filters:
+            exp = expected["results_by_store"][store_key]["retrieved_chunks"]
+            act = actual["results_by_store"][store_key]["retrieved_chunks"]
+            assert [c["chunk_id"] for c in act] == [c["chunk_id"] for c in exp]
+            assert [c["similarity_score"] for c in act] == pytest.approx([c["similarity_score"] for c in exp], abs=1e-5)
+
+    searched = []
+    search = rer.filtered_search
+    monkeypatch.setattr(rer, "filtered_search", lambda store, *args: searched.append(store) or search(store, *args))
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "indexes.sqlite")))
+    rer.retrieve_multi("eba query", store_filters, top_k=4, unified=True)
+    assert searched == [rer.vector_store[store_key] for store_key in store_filters]
+
+
+@pytest.mark.parametrize("threshold", [0.0, 0.55, 0.8])
+def test_threshold_is_pushed_into_search(threshold):
+    store = rer.vector_store["eba"]
+    queries = store["vectors"][:4]
+
+    results = rer.search_store("eba", queries, top_k=8, threshold=threshold)
+
+    distances, indices = store["index"].search(rer.prepare_queries(store, queries), 8)
+    for row, hits in enumerate(results):
+        expected = [store["ids"][i] for d, i in zip(distances[row], indices[row]) if i >= 0 and d >= threshold]
+        assert [h["chunk_id"] for h in hits] == expected
+        assert len(hits) <= 8
+
+    unified = rer.search_unified(queries[0], {"eba": {}}, top_k=8, threshold=threshold)
+    assert [h["chunk_id"] for h in unified["eba"]] == [h["chunk_id"] for h in results[0]]
@@ -0,0 +1,122 @@
+"""
+STEP 4 — Single-Flight Tests
+----------------------------
+Concurrent identical requests must share one computation (threads,
+coroutines and, with file locks, separate flight groups sharing a cache),
+and failures must reach every waiting caller.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.generation import citation_bound_answer_generation as cbag
+from src.retrieval import run_embeddings_retrieval as rer
+from src.retrieval.result_cache import ResultCache
+from src.retrieval.single_flight import SingleFlight, fcntl
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight(lock_dir=None)
+    calls = []
+
+    def slow_answer():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"answer": "shared"}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flight.do("q", slow_answer), range(8)))
+
+    assert len(calls) == 1
+    assert all(r == {"answer": "shared"} for r in results)
+    assert flight.stats == {"leaders": 1, "followers": 7}
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight(lock_dir=None)
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("LLM unavailable")
+
+    def follower():
+        started.wait()
+        return flight.do("q", failing)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(flight.do, "q", failing), pool.submit(follower)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result()
+
+
+@pytest.mark.skipif(fcntl is None, reason="file locks need fcntl")
+def test_file_lock_serializes_separate_processes(tmp_path):
+    # Two flight groups stand in for two worker processes sharing one cache
+    cache = {}
+    calls = []
+
+    def load_or_compute():
+        if "q" in cache:
+            return cache["q"]
+        calls.append(1)
+        time.sleep(0.2)
+        cache["q"] = "answer"
+        return cache["q"]
+
+    workers = [SingleFlight(lock_dir=str(tmp_path)) for _ in range(2)]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(lambda flight: flight.do("q", load_or_compute), workers))
+
+    assert results == ["answer", "answer"]
+    assert len(calls) == 1
+
+
+@pytest.mark.skipif(fcntl is None, reason="file locks need fcntl")
+@pytest.mark.asyncio
+async def test_async_retrieval_with_file_locks(monkeypatch, tmp_path):
+    # aretrieve must not re-enter its own key's flight (and file lock) via retrieve
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(rer, "retrieval_flight", SingleFlight("retrieval", lock_dir=str(tmp_path / "locks")))
+    query_vector = rer.vector_store["dora"]["vectors"][3]
+
+    single = await asyncio.wait_for(
+        rer.aretrieve("ICT risk", "dora", query_vector=query_vector, threshold=0.0), timeout=30
+    )
+    multi = await asyncio.wait_for(
+        rer.aretrieve_multi("ICT risk", ["cssf", "dora", "eba"], query_vector=query_vector,
+                            unified=False, threshold=0.0),
+        timeout=30
+    )
+
+    assert single["retrieved_chunks"]
+    assert multi["results_by_store"]["dora"]["retrieved_chunks"] == single["retrieved_chunks"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cached_answers_share_one_generation(monkeypatch, tmp_path):
+    calls = []
+
+    async def fake_agenerate(query_text, top_k=5, multi_retrieval=None):
+        calls.append(query_text)
+        await asyncio.sleep(0.1)
+        return {"query": query_text, "answer": "Major ICT incidents must be reported [DORA 19]."}
+
+    monkeypatch.setattr(cbag, "answer_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(cbag, "answer_cache_key", lambda query_text, top_k=5, multi_retrieval=None: f"{query_text}|{top_k}")
+    monkeypatch.setattr(cbag, "answer_flight", SingleFlight(lock_dir=None))
+    monkeypatch.setattr(cbag, "agenerate_citation_bound_answer", fake_agenerate)
+
+    responses = await asyncio.gather(*[
+        cbag.agenerate_citation_bound_answer_cached("ICT incident reporting?") for _ in range(5)
+    ])
+
+    assert calls == ["ICT incident reporting?"]
+    assert all(r == responses[0] for r in responses)
+    assert cbag.answer_cache.get(cbag.ANSWER_CACHE_NAMESPACE, "ICT incident reporting?|5") == responses[0]
@@ -71,27 +71,33 @@ def citation_result_fixture():
 @pytest.mark.asyncio
 async def test_retrieval_agent_returns_documents(monkeypatch):
     # Patch underlying retrieval function
-    monkeypatch.setattr(
-        "src.agents.retrieval_agent.retrieve",
-        lambda query_text, vector_store_key: {
-            "retrieved_chunks": [{"source_reference": f"{vector_store_key}-1", "text": "chunk text"}]
+    async def fake_aretrieve_answer_sources(query_text):
+        return {
+            "results_by_store": {
+                store_key: {
+                    "retrieved_chunks": [{"source_reference": f"{store_key}-1", "text": "chunk text"}]
+                }
+                for store_key in ra.VECTOR_STORES
+            }
         }
-    )
+
+    monkeypatch.setattr("src.agents.retrieval_agent.aretrieve_answer_sources", fake_aretrieve_answer_sources)
 
     result = await ra.retrieval_agent("test query")
 
     assert "agent_result" in result
     assert "retrieved_chunks" in result
     assert len(result["retrieved_chunks"]) == 3
+    assert set(result["multi_retrieval"]["results_by_store"]) == set(ra.VECTOR_STORES)
     assert result["agent_result"]["agent_name"] == "retrieval"
 
 
 @pytest.mark.asyncio
 async def test_retrieval_agent_no_results(monkeypatch):
-    monkeypatch.setattr(
-        "src.agents.retrieval_agent.retrieve",
-        lambda query_text, vector_store_key: {"retrieved_chunks": []}
-    )
+    async def fake_aretrieve_answer_sources(query_text):
+        return {"results_by_store": {store_key: {"retrieved_chunks": []} for store_key in ra.VECTOR_STORES}}
+
+    monkeypatch.setattr("src.agents.retrieval_agent.aretrieve_answer_sources", fake_aretrieve_answer_sources)
 
     with pytest.raises(ValueError):
         await ra.retrieval_agent("test query")
@@ -104,17 +110,20 @@ async def test_retrieval_agent_no_results(monkeypatch):
 @pytest.mark.asyncio
 async def test_citation_agent_returns_structured_output(monkeypatch):
     # Patch cached generation
-    monkeypatch.setattr(
-        "src.agents.citation_agent.generate_citation_bound_answer_cached",
-        lambda query_text, top_k=5: {
+    async def fake_generation(query_text, top_k=5, multi_retrieval=None):
+        assert multi_retrieval == {"results_by_store": {}, "fused_chunks": []}
+        return {
             "answer": "Test answer",
             "retrieved_chunks": [{"source_id": "REG-1", "excerpt": "Test chunk"}],
             "answer_confidence": 0.8,
             "timestamp": "2026-01-03T00:00:00"
         }
-    )
 
-    result = await ca.citation_agent("test query", {"retrieved_chunks": []})
+    monkeypatch.setattr("src.agents.citation_agent.agenerate_citation_bound_answer_cached", fake_generation)
+
+    result = await ca.citation_agent(
+        "test query", {"retrieved_chunks": [], "multi_retrieval": {"results_by_store": {}, "fused_chunks": []}}
+    )
     agent_result = result["agent_result"]
 
     assert agent_result["answer"] == "Test answer"
@@ -123,6 +132,52 @@ async def test_citation_agent_returns_structured_output(monkeypatch):
     assert "timestamp" in result  # timestamp is still top-level
 
 
+@pytest.mark.asyncio
+async def test_citation_agent_reuses_retrieval(monkeypatch, tmp_path):
+    from src.generation import citation_bound_answer_generation as cbag
+    from src.retrieval import run_embeddings_retrieval as rer
+    from src.retrieval.result_cache import ResultCache
+
+    monkeypatch.setattr(rer, "result_cache", ResultCache(path=str(tmp_path / "results.sqlite")))
+    monkeypatch.setattr(cbag, "answer_cache", ResultCache(path=str(tmp_path / "answers.sqlite")))
+
+    multi_retrieval = rer.retrieve_multi(
+        "ICT risk", cbag.regulator_filters(), query_vector=rer.vector_store["dora"]["vectors"][0],
+        threshold=0.0
+    )
+    prompts = []
+
+    async def no_retrieval(*args, **kwargs):
+        raise AssertionError("citation agent retrieved again")
+
+    async def fake_allm_call(prompt):
+        prompts.append(prompt)
+        return "Answer [DORA]."
+
+    monkeypatch.setattr(cbag, "aretrieve_multi", no_retrieval)
+    monkeypatch.setattr(cbag, "allm_call", fake_allm_call)
+
+    result = await ca.citation_agent("ICT risk", {"multi_retrieval": multi_retrieval})
+
+    assert len(prompts) == 1
+    assert result["retrieved_chunks"]
+    assert {c["chunk_id"] for c in result["retrieved_chunks"]} <= {
+        c["chunk_id"] for c in multi_retrieval["fused_chunks"]
+    }
+
+
+def test_answer_cache_key_covers_supplied_retrieval():
+    from src.generation import citation_bound_answer_generation as cbag
+
+    def sources(*chunk_ids):
+        return {"fused_chunks": [{"vector_store_key": "dora", "chunk_id": c} for c in chunk_ids]}
+
+    key = cbag.answer_cache_key("ICT risk", 5, sources("a", "b"))
+    assert key == cbag.answer_cache_key("ICT risk", 5, sources("b", "a"))
+    assert key != cbag.answer_cache_key("ICT risk", 5, sources("a", "c"))
+    assert key != cbag.answer_cache_key("ICT risk", 5)
+
+
 # -------------------------------
 # Summarization Agent Tests
 # -------------------------------
@@ -0,0 +1,47 @@
+"""
+STEP 4 — Vector Store Manager Tests
+-----------------------------------
+Stores must load on first use only, and warmup/close must
+control their lifecycle explicitly.
+"""
+
+import pytest
+
+from src.retrieval import run_embeddings_retrieval as rer
+
+
+def test_manager_is_lazy_and_reloadable():
+    manager = rer.VectorStoreManager()
+    assert not manager.is_loaded("dora")
+
+    store = manager["dora"]
+    assert manager.is_loaded("dora")
+    assert not manager.is_loaded("cssf")
+    assert len(store["ids"]) == len(store["metadata"]) == store["index"].ntotal
+
+    manager.close()
+    assert not manager.is_loaded("dora")
+
+    manager.warmup(["cssf", "eba"])
+    assert manager.is_loaded("cssf") and manager.is_loaded("eba")
+
+
+def test_manager_rejects_unknown_store():
+    with pytest.raises(KeyError):
+        rer.VectorStoreManager()["gdpr"]
+
+
+
+def test_mmap_store_matches_in_memory_store():
+    in_memory = rer.VectorStoreManager(mmap=False)["eba"]
+    mapped = rer.VectorStoreManager(mmap=True)["eba"]
+
+    # Vectors are a read-only view into the memory-mapped index (no private copy)
+    assert not mapped["vectors"].flags.owndata
+    assert not mapped["vectors"].flags.writeable
+    assert mapped["ids"] == in_memory["ids"]
+
+    query = rer.np.array(in_memory["vectors"][:2])
+    expected = in_memory["index"].search(query, 5)
+    actual = mapped["index"].search(query, 5)
+    assert (actual[1] == expected[1]).all()
@@ -4,7 +4,10 @@ Supports follow-ups and remembers previous queries in the session.
 """
 
 import streamlit as st
-from src.generation.citation_bound_answer_generation import generate_citation_bound_answer_cached
+from src.generation.citation_bound_answer_generation import (
+    generate_citation_bound_answer_cached,
+    stream_citation_bound_answer_cached,
+)
 
 # -------------------------------
 # Page Configuration
@@ -49,6 +52,11 @@ top_k = st.slider(
     value=5
 )
 
+stream_answer = st.checkbox(
+    "Stream answer (show tokens as they are generated)",
+    value=True
+)
+
 submit_button = st.button("Submit Query / Follow-Up")
 
 # -------------------------------
@@ -56,25 +64,36 @@ submit_button = st.button("Submit Query / Follow-Up")
 # -------------------------------
 if submit_button and st.session_state.current_query.strip():
     query_text = st.session_state.current_query.strip()
-    with st.spinner("Generating citation-bound answer..."):
-        try:
-            # Get cached answer for speed
-            response = generate_citation_bound_answer_cached(query_text)
+    # Live streamed answer; cleared once it is rendered in the history below
+    live_answer = st.empty()
+    try:
+        if stream_answer:
+            with st.spinner("Retrieving sources..."):
+                stream = stream_citation_bound_answer_cached(query_text, top_k=top_k)
+            with live_answer.container():
+                st.markdown(f"**Q:** {query_text}")
+                st.write_stream(stream)
+            response = stream.response
+        else:
+            with st.spinner("Generating citation-bound answer..."):
+                # Get cached answer for speed
+                response = generate_citation_bound_answer_cached(query_text, top_k=top_k)
 
-            # Append to session conversation
-            st.session_state.conversation.append({
-                "query": query_text,
-                "answer": response["answer"],
-                "answer_confidence": response["answer_confidence"],
-                "retrieved_chunks": response["retrieved_chunks"],
-                "timestamp": response["timestamp"]
-            })
+        # Append to session conversation
+        st.session_state.conversation.append({
+            "query": query_text,
+            "answer": response["answer"],
+            "answer_confidence": response["answer_confidence"],
+            "retrieved_chunks": response["retrieved_chunks"],
+            "timestamp": response["timestamp"]
+        })
 
-            # Clear the text area for next query
-            st.session_state.current_query = ""
+        # Clear the text area for next query
+        st.session_state.current_query = ""
+        live_answer.empty()
 
-        except Exception as e:
-            st.error(f"An error occurred: {str(e)}")
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
 
 # -------------------------------
 # Display Conversation History
@@ -5,7 +5,11 @@ Uses STEP 4 retrieval + STEP 5 engine to provide a clean, audit-friendly interfa
 
 import streamlit as st
 from datetime import datetime
-from src.generation.citation_bound_answer_generation import generate_citation_bound_answer, generate_citation_bound_answer_cached
+from src.generation.citation_bound_answer_generation import (
+    generate_citation_bound_answer,
+    generate_citation_bound_answer_cached,
+    stream_citation_bound_answer_cached,
+)
 import json
 
 # -------------------------------
@@ -41,6 +45,11 @@ top_k = st.slider(
     value=5
 )
 
+stream_answer = st.checkbox(
+    "Stream answer (show tokens as they are generated)",
+    value=True
+)
+
 generate_button = st.button("Generate Answer")
 
 # -------------------------------
@@ -50,36 +59,45 @@ if generate_button:
     if not query_text.strip():
         st.error("Query cannot be empty!")
     else:
-        with st.spinner("Generating citation-bound answer..."):
-            try:
-                #response = generate_citation_bound_answer(query_text, top_k=top_k)
-                response = generate_citation_bound_answer_cached(query_text)
+        try:
+            if stream_answer:
+                with st.spinner("Retrieving sources..."):
+                    stream = stream_citation_bound_answer_cached(query_text, top_k=top_k)
+
+                # Answer Section (rendered token by token)
+                st.subheader("✅ Answer")
+                st.write_stream(stream)
+                response = stream.response
+            else:
+                with st.spinner("Generating citation-bound answer..."):
+                    #response = generate_citation_bound_answer(query_text, top_k=top_k)
+                    response = generate_citation_bound_answer_cached(query_text, top_k=top_k)
 
                 # Answer Section
                 st.subheader("✅ Answer")
                 st.markdown(response["answer"])
 
-                # Confidence Section
-                st.subheader("📏 Answer Confidence")
-                st.metric(
-                    label="Confidence (0.0 = low, 1.0 = high)",
-                    value=f"{response['answer_confidence']:.2f}"
-                )
+            # Confidence Section
+            st.subheader("📏 Answer Confidence")
+            st.metric(
+                label="Confidence (0.0 = low, 1.0 = high)",
+                value=f"{response['answer_confidence']:.2f}"
+            )
 
-                # Retrieved Chunks Table
-                st.subheader("📚 Retrieved Chunks")
-                if response.get("retrieved_chunks"):
-                    st.dataframe(response["retrieved_chunks"])
-                else:
-                    st.info("No chunks retrieved. Check your query or filters.")
+            # Retrieved Chunks Table
+            st.subheader("📚 Retrieved Chunks")
+            if response.get("retrieved_chunks"):
+                st.dataframe(response["retrieved_chunks"])
+            else:
+                st.info("No chunks retrieved. Check your query or filters.")
 
-                # Audit / JSON Panel
-                st.subheader("🔍 Full STEP 5 Output (JSON)")
-                with st.expander("Show JSON"):
-                    st.json(response)
+            # Audit / JSON Panel
+            st.subheader("🔍 Full STEP 5 Output (JSON)")
+            with st.expander("Show JSON"):
+                st.json(response)
 
-                # Timestamp
-                st.caption(f"Generated at: {response['timestamp']}")
+            # Timestamp
+            st.caption(f"Generated at: {response['timestamp']}")
 
-            except Exception as e:
-                st.error(f"An error occurred: {str(e)}")
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
@@ -7,7 +7,7 @@ import json
 ROOT_DIR = Path(__file__).resolve().parents[2]
 sys.path.append(str(ROOT_DIR))
 
-from src.run_embeddings_retrieval import retrieve
+from src.retrieval.run_embeddings_retrieval import retrieve
 
 st.title("Regulatory Retrieval Assistant")
 
@@ -11,7 +11,7 @@ import base64
 ROOT_DIR = Path(__file__).resolve().parents[2]
 sys.path.append(str(ROOT_DIR))
 
-from src.run_embeddings_retrieval import retrieve
+from src.retrieval.run_embeddings_retrieval import retrieve
 
 st.set_page_config(page_title="Regulatory Retrieval RAG", layout="wide")
 
@@ -66,13 +66,9 @@ if st.button("Retrieve") and query_text and selected_regulators:
                 vector_store_key=store_key,
                 authority=authority,
                 jurisdiction=jurisdiction,
-                top_k=top_k
+                top_k=top_k,
+                threshold=sim_threshold
             )
-            # filter by similarity threshold
-            result["retrieved_chunks"] = [
-                c for c in result["retrieved_chunks"]
-                if c["similarity_score"] >= sim_threshold
-            ]
             set_cached_result(cache_key, result)
         all_results.append((reg, result))
 
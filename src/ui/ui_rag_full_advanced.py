@@ -12,7 +12,7 @@ from reportlab.lib.pagesizes import letter
 ROOT_DIR = Path(__file__).resolve().parents[2]
 sys.path.append(str(ROOT_DIR))
 
-from src.run_embeddings_retrieval import retrieve, vector_store
+from src.retrieval.run_embeddings_retrieval import retrieve, vector_store
 
 st.set_page_config(page_title="Advanced Regulatory RAG", layout="wide")
 st.title("📜 Regulatory Retrieval Assistant (Advanced)")
@@ -110,21 +110,17 @@ if st.button("Retrieve") and query_text and selected_regulators:
                 vector_store_key=store_key,
                 authority=authority,
                 jurisdiction=jurisdiction,
-                top_k=top_k
+                top_k=top_k,
+                threshold=sim_threshold
             )
-            # filter by similarity threshold
-            result["retrieved_chunks"] = [
-                c for c in result["retrieved_chunks"] if c["similarity_score"] >= sim_threshold
-            ]
             set_cached_result(cache_key, result)
 
         # Add text to each chunk for display & export
-        for c in result["retrieved_chunks"]:
-            meta_chunks = [m for m in vector_store[store_key]["metadata"] if m["chunk_id"] == c["chunk_id"]]
-            if meta_chunks:
-                c["text"] = highlight_terms(meta_chunks[0]["text"], query_text)
-                c["regulator"] = reg
-                aggregated_results.append(c)
+        registry = vector_store[store_key]["registry"]
+        for c in registry.hydrate(result["retrieved_chunks"], fields=("text",)):
+            c["text"] = highlight_terms(c["text"], query_text)
+            c["regulator"] = reg
+            aggregated_results.append(c)
 
     # -------------------------
     # Display results